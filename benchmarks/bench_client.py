@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the clients against the local simulator of the webservice:
+requests per second, parse throughput and memory of the listings.
+
+Usage: python benchmarks/bench_client.py [number of products] [latency ms]
+"""
+import gc
+import sys
+import tracemalloc
+
+from timeit import default_timer as timer
+
+from prestapyt import MetricsCollector
+from prestapyt import PrestaShopWebService
+from prestapyt import PrestaShopWebServiceDict
+
+from simulator import Simulator
+
+
+def rate(label, count, elapsed, unit='requests'):
+    print('%-36s %8.1f %s/s  (%d in %.2fs)' % (
+        label, count / elapsed, unit, count, elapsed))
+
+
+def measure(func):
+    """Duration of func, then peak of memory allocated by a second run
+    (tracing the allocations slows down the run)."""
+    gc.collect()
+    start = timer()
+    result = func()
+    elapsed = timer() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_requests(simulator, count):
+    print('\n== requests')
+    ids = list(range(1, count + 1))
+    for cls in (PrestaShopWebService, PrestaShopWebServiceDict):
+        client = cls(simulator.api_url, simulator.api_key)
+        start = timer()
+        for product_id in ids:
+            client.get('products', product_id)
+        rate('%s.get' % cls.__name__, count, timer() - start)
+
+    client = PrestaShopWebServiceDict(simulator.api_url, simulator.api_key)
+    for workers in (4, 16):
+        start = timer()
+        results = client.get_many('products', ids, max_workers=workers)
+        assert not any(result.error for result in results)
+        rate('get_many (%d workers)' % workers, count, timer() - start)
+
+    start = timer()
+    records, missing = client.get_batched('products', ids)
+    assert not missing
+    rate('get_batched', count, timer() - start, unit='records')
+
+    start = timer()
+    new_ids = []
+    for product_id in ids[:count // 4]:
+        product = client.get('products', product_id)
+        product['product'].pop('id')
+        response = client.add('products', product)
+        new_ids.append(int(response['prestashop']['product']['id']))
+    rate('get + add', len(new_ids), timer() - start)
+    start = timer()
+    client.delete_many('products', new_ids)
+    rate('delete_many', len(new_ids), timer() - start, unit='records')
+
+
+def bench_listing(simulator, count):
+    print('\n== listing of %d products, display=full' % count)
+    options = {'display': 'full'}
+    collector = MetricsCollector()
+    client = PrestaShopWebServiceDict(simulator.api_url, simulator.api_key)
+    collector.install(client)
+    records, elapsed, peak = measure(
+        lambda: client.get('products', options=options))
+    rate('get (dict)', count, elapsed, unit='records')
+    stats = collector.summary()['products']
+    print('  network %.1f ms, XML parse %.1f ms, dict conversion %.1f ms'
+          % tuple(stats[timing]['p50'] * 1000
+                  for timing in collector.TIMINGS))
+    print('  peak memory %.1f MB' % (peak / 1e6,))
+    del records
+
+    for label, func in (
+            ('get (ElementTree)', lambda: PrestaShopWebService(
+                simulator.api_url, simulator.api_key).get(
+                    'products', options=options)),
+            ('get_compact', lambda: client.get_compact(
+                'products', options=options)),
+            ('iter_get (pages of 100)', lambda: sum(
+                1 for __ in client.iter_get('products', page_size=100))),
+            ('stream_get', lambda: sum(
+                1 for __ in client.stream_get('products', options))),
+    ):
+        result, elapsed, peak = measure(func)
+        del result
+        rate(label, count, elapsed, unit='records')
+        print('  peak memory %.1f MB' % (peak / 1e6,))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    with Simulator(products=count, latency=latency) as simulator:
+        print('simulator %s, %d products, latency %.1f ms' % (
+            simulator.api_url, count, latency * 1000))
+        bench_requests(simulator, min(count, 200))
+        bench_listing(simulator, count)
+        print('\n%d requests served' % (simulator.requests,))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the dict2xml engines on products with multilingual fields.
+
+Usage: python benchmarks/bench_dict2xml.py [number of products]
+"""
+import sys
+import timeit
+
+from xml.etree import ElementTree
+
+from prestapyt import dict2xml
+
+from fixtures import product, products_listing
+
+
+def bench(label, data, number):
+    results = {}
+    for engine in sorted(dict2xml.ENGINES):
+        timer = timeit.Timer(
+            lambda: dict2xml.dict2xml(data, engine=engine))
+        results[engine] = min(timer.repeat(repeat=3, number=number)) / number
+    # the engines may escape differently, compare the parsed documents
+    same = len(set(
+        ElementTree.canonicalize(dict2xml.dict2xml(data, engine=engine))
+        for engine in dict2xml.ENGINES)) == 1
+    print('%-28s %s  equivalent output: %s' % (
+        label,
+        '  '.join('%s: %8.3f ms' % (engine, seconds * 1000)
+                  for engine, seconds in sorted(results.items())),
+        same))
+    print('%-28s speedup: %.1fx' % (
+        '', results['minidom'] / results['fast']))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bench('1 product (add/edit)', {'prestashop': {'product': product(1)}},
+          number=200)
+    bench('%d products listing' % count, products_listing(count), number=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the ElementTree to dict conversion (xml2dict.ET2dict).
+
+The former recursive implementation is kept here as a reference, the
+benchmark checks both give the same result.
+
+Usage: python benchmarks/bench_xml2dict.py [number of products]
+"""
+import re
+import sys
+import timeit
+
+from xml.etree import ElementTree
+
+from prestapyt import xml2dict
+
+from fixtures import products_xml
+
+
+def legacy_parse_node(node):
+    tree = {}
+    attrs = {}
+    for attr_tag, attr_value in node.attrib.items():
+        if attr_tag == '{http://www.w3.org/1999/xlink}href':
+            continue
+        attrs.update(legacy_make_dict(attr_tag, attr_value))
+    value = node.text.strip() if node.text is not None else ''
+    if attrs:
+        tree['attrs'] = attrs
+    has_child = False
+    for child in list(node):
+        has_child = True
+        ctag = child.tag
+        ctree = legacy_parse_node(child)
+        cdict = legacy_make_dict(ctag, ctree)
+        if ctree:
+            value = ''
+        if ctag not in tree:
+            tree.update(cdict)
+            continue
+        old = tree[ctag]
+        if not isinstance(old, list):
+            tree[ctag] = [old]
+        tree[ctag].append(ctree)
+    if not has_child:
+        tree['value'] = value
+    if list(tree.keys()) == ['value']:
+        tree = tree['value']
+    return tree
+
+
+def legacy_make_dict(tag, value):
+    tag_values = value
+    result = re.compile(r"\{(.*)\}(.*)").search(tag)
+    if result:
+        tag_values = {'value': value}
+        tag_values['xmlns'], tag = result.groups()
+    return {tag: tag_values}
+
+
+def legacy_ET2dict(element_tree):
+    return legacy_make_dict(element_tree.tag, legacy_parse_node(element_tree))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    content = products_xml(count)
+    tree = ElementTree.fromstring(content)
+    elements = sum(1 for __ in tree.iter())
+    print('%d products, %d elements, %d bytes' % (
+        count, elements, len(content)))
+
+    same = xml2dict.ET2dict(tree) == legacy_ET2dict(tree)
+    print('identical output: %s' % (same,))
+
+    timings = {}
+    for label, func in (('legacy', legacy_ET2dict),
+                        ('ET2dict', xml2dict.ET2dict)):
+        timer = timeit.Timer(lambda: func(tree))
+        timings[label] = min(timer.repeat(repeat=3, number=3)) / 3
+        print('%-8s %8.1f ms  %8.0f elements/s' % (
+            label, timings[label] * 1000, elements / timings[label]))
+    print('speedup: %.1fx' % (timings['legacy'] / timings['ET2dict'],))
+
+    # a deep document is converted without hitting the recursion limit
+    depth = sys.getrecursionlimit() * 2
+    deep = ElementTree.fromstring('<a>' * depth + '</a>' * depth)
+    xml2dict.ET2dict(deep)
+    print('document of depth %d converted' % (depth,))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Sample PrestaShop records used by the benchmarks.
+"""
+
+XLINK = 'http://www.w3.org/1999/xlink'
+API_URL = 'http://localhost:8080/api/'
+
+
+def href(resource, resource_id):
+    return {'value': '%s%s/%s' % (API_URL, resource, resource_id),
+            'xmlns': XLINK}
+
+
+def multilang(value, languages=(1, 2, 3)):
+    return {'language': [{'attrs': {'id': str(lang),
+                                    'href': href('languages', lang)},
+                          'value': '%s (%s)' % (value, lang)}
+                         for lang in languages]}
+
+
+def product(product_id, languages=(1, 2, 3)):
+    """A product as a dict, as given to dict2xml"""
+    return {
+        'id': product_id,
+        'id_manufacturer': {'attrs': {'href': href('manufacturers', 1)},
+                            'value': '1'},
+        'id_supplier': {'attrs': {'href': href('suppliers', 1)},
+                        'value': '1'},
+        'id_category_default': {'attrs': {'href': href('categories', 2)},
+                                'value': '2'},
+        'id_tax_rules_group': '1',
+        'reference': 'REF-%06d' % product_id,
+        'ean13': '3760000%06d' % product_id,
+        'price': '%d.990000' % (product_id % 100),
+        'wholesale_price': '%d.000000' % (product_id % 50),
+        'weight': '0.500000',
+        'active': '1',
+        'available_for_order': '1',
+        'condition': 'new',
+        'visibility': 'both',
+        'date_add': '2012-02-06 09:33:52',
+        'date_upd': '2012-02-07 11:18:48',
+        'name': multilang('Product & co <%d>' % product_id, languages),
+        'description': multilang('<p>Description of "%d"</p>' % product_id,
+                                 languages),
+        'description_short': multilang('Short description', languages),
+        'link_rewrite': multilang('product-%d' % product_id, languages),
+        'meta_title': multilang('Meta title', languages),
+        'available_now': multilang('In stock', languages),
+        'associations': {
+            'categories': {'category': [{'id': '2'}, {'id': '3'}]},
+            'images': {'image': [{'id': str(product_id * 2)},
+                                 {'id': str(product_id * 2 + 1)}]},
+        },
+    }
+
+
+def products_listing(count, languages=(1, 2, 3)):
+    """A display=full listing of products as a dict"""
+    return {'prestashop': {'products': {
+        'product': [product(i, languages) for i in range(1, count + 1)]
+    }}}
+
+
+def _xml_language(value, languages):
+    return ''.join(
+        '<language id="%d" xlink:href="%slanguages/%d">'
+        '<![CDATA[%s (%d)]]></language>' % (lang, API_URL, lang, value, lang)
+        for lang in languages)
+
+
+def product_xml(product_id, languages=(1, 2, 3)):
+    """A product as returned by the webservice, without the root tag"""
+    fields = [
+        '<id><![CDATA[%d]]></id>' % product_id,
+        '<id_manufacturer xlink:href="%smanufacturers/1">'
+        '<![CDATA[1]]></id_manufacturer>' % API_URL,
+        '<id_supplier xlink:href="%ssuppliers/1">'
+        '<![CDATA[1]]></id_supplier>' % API_URL,
+        '<id_category_default xlink:href="%scategories/2">'
+        '<![CDATA[2]]></id_category_default>' % API_URL,
+        '<id_default_image xlink:href="%simages/products/%d/%d" '
+        'not_filterable="true"><![CDATA[%d]]></id_default_image>' % (
+            API_URL, product_id, product_id * 2, product_id * 2),
+        '<reference><![CDATA[REF-%06d]]></reference>' % product_id,
+        '<ean13><![CDATA[3760000%06d]]></ean13>' % product_id,
+        '<price><![CDATA[%d.990000]]></price>' % (product_id % 100),
+        '<wholesale_price><![CDATA[%d.000000]]></wholesale_price>' % (
+            product_id % 50),
+        '<weight><![CDATA[0.500000]]></weight>',
+        '<active><![CDATA[1]]></active>',
+        '<condition><![CDATA[new]]></condition>',
+        '<date_add><![CDATA[2012-02-06 09:33:52]]></date_add>',
+        '<date_upd><![CDATA[2012-02-07 11:18:48]]></date_upd>',
+    ]
+    for field in ('name', 'description', 'description_short',
+                  'link_rewrite', 'meta_title', 'available_now'):
+        fields.append('<%s>%s</%s>' % (
+            field, _xml_language('%s %d' % (field, product_id), languages),
+            field))
+    fields.append(
+        '<associations>'
+        '<categories nodeType="category" api="categories">'
+        '<category xlink:href="%scategories/2"><id><![CDATA[2]]></id>'
+        '</category>'
+        '<category xlink:href="%scategories/3"><id><![CDATA[3]]></id>'
+        '</category>'
+        '</categories>'
+        '</associations>' % (API_URL, API_URL))
+    return '<product>%s</product>' % ''.join(fields)
+
+
+def products_xml(count, languages=(1, 2, 3)):
+    """A display=full listing of products as returned by the webservice"""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<prestashop xmlns:xlink="http://www.w3.org/1999/xlink">'
+        '<products>%s</products></prestashop>' % ''.join(
+            product_xml(i, languages) for i in range(1, count + 1))
+    ).encode('utf-8')
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in of the PrestaShop webservice, to run the client against.
+
+It serves the products of the fixtures (and empty resources accepting
+new records) with the parts of the API used by the client:
+
+- listings with 'limit', 'filter', 'display', 'sort' (and 'date')
+- GET, HEAD, POST, PUT and DELETE of a record, DELETE of ?id=[1,2]
+- 'schema=blank' and 'schema=synopsis'
+- the 'psws-version' header and the basic authentication with the key
+- a latency and a rate of errors (500) injected in the responses
+
+    with Simulator(products=1000, latency=0.005) as simulator:
+        prestashop = PrestaShopWebServiceDict(simulator.api_url,
+                                              simulator.api_key)
+        prestashop.get('products', 1)
+
+Usage: python benchmarks/simulator.py [number of products] [port]
+"""
+import base64
+import datetime
+import random
+import re
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qsl
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+import fixtures
+
+API_KEY = 'SIMULATORKEY0000000000000000000'
+PSWS_VERSION = '1.7.8.0'
+XLINK_HREF = '{%s}href' % fixtures.XLINK
+# resources served, with the tag of their records
+TAGS = {
+    'products': 'product',
+    'categories': 'category',
+    'customers': 'customer',
+    'addresses': 'address',
+    'orders': 'order',
+}
+
+ElementTree.register_namespace('xlink', fixtures.XLINK)
+
+
+def field_format(field):
+    """Format of a field in the synopsis, as declared by PrestaShop."""
+    if field == 'id' or field.startswith('id_'):
+        return 'isUnsignedId'
+    if field in ('price', 'wholesale_price'):
+        return 'isPrice'
+    if field == 'weight':
+        return 'isUnsignedFloat'
+    if field.startswith('date_'):
+        return 'isDate'
+    if field in ('active', 'available_for_order'):
+        return 'isBool'
+    return 'isGenericName'
+
+
+class Catalog(object):
+    """Records of the resources, as elements, by resource and id."""
+
+    def __init__(self, products=1000, languages=(1, 2, 3)):
+        self.lock = threading.Lock()
+        self.records = dict((resource, {}) for resource in TAGS)
+        self.next_ids = dict((resource, 1) for resource in TAGS)
+        start = datetime.datetime(2012, 2, 7, 11, 18, 48)
+        for product_id in range(1, products + 1):
+            element = ElementTree.fromstring(
+                '<prestashop xmlns:xlink="%s">%s</prestashop>' % (
+                    fixtures.XLINK,
+                    fixtures.product_xml(product_id, languages)))[0]
+            # a distinct date per product, a few products per second
+            date_upd = start + datetime.timedelta(seconds=product_id // 3)
+            element.find('date_upd').text = date_upd.strftime(
+                '%Y-%m-%d %H:%M:%S')
+            self.records['products'][product_id] = element
+        self.next_ids['products'] = products + 1
+        # the envelope of each resource, from its first record
+        self.templates = {'products': self.records['products'].get(1)}
+
+    def template(self, resource):
+        """Record with the fields of the resource, the values are dropped."""
+        record = self.templates.get(resource)
+        if record is None:
+            return ElementTree.Element(TAGS[resource])
+        blank = ElementTree.fromstring(ElementTree.tostring(record))
+        for node in blank.iter():
+            node.text = None
+            node.attrib.pop(XLINK_HREF, None)
+        return blank
+
+    def synopsis(self, resource):
+        synopsis = self.template(resource)
+        for field in synopsis:
+            if field.tag != 'associations':
+                field.set('format', field_format(field.tag))
+        return synopsis
+
+    def add(self, resource, record):
+        with self.lock:
+            record_id = self.next_ids[resource]
+            self.next_ids[resource] += 1
+            self._write(record, record_id)
+            self.records[resource][record_id] = record
+            self.templates.setdefault(resource, record)
+        return record
+
+    def edit(self, resource, record_id, record):
+        with self.lock:
+            old = self.records[resource].get(record_id)
+            if old is None:
+                return None
+            self._write(record, record_id, old.findtext('date_add'))
+            self.records[resource][record_id] = record
+        return record
+
+    @staticmethod
+    def _write(record, record_id, date_add=None):
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for tag, value in (('id', str(record_id)),
+                           ('date_add', date_add or now),
+                           ('date_upd', now)):
+            node = record.find(tag)
+            if node is None:
+                node = ElementTree.SubElement(record, tag)
+            node.text = value
+
+    def delete(self, resource, record_ids):
+        with self.lock:
+            records = self.records[resource]
+            if any(record_id not in records for record_id in record_ids):
+                return False
+            for record_id in record_ids:
+                del records[record_id]
+        return True
+
+
+def _match(value, condition):
+    """Whether a value satisfies a filter, ie: '[1|5]', '[1,5]', '[ab]%'"""
+    found = re.match(r'^(%?)\[(.*)\](%?)$', condition)
+    if not found:
+        return value == condition
+    prefix, inner, suffix = found.groups()
+    if prefix or suffix:
+        if prefix and suffix:
+            return inner.lower() in value.lower()
+        if prefix:
+            return value.lower().endswith(inner.lower())
+        return value.lower().startswith(inner.lower())
+    if '|' in inner or not inner:
+        return value in inner.split('|')
+    if ',' in inner:
+        low, high = inner.split(',', 1)
+        return _compare(low, value) <= 0 <= _compare(high, value)
+    return value == inner
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _compare(left, right):
+    """Compare as numbers when possible, otherwise as strings."""
+    left_number, right_number = _number(left), _number(right)
+    if left_number is not None and right_number is not None:
+        left, right = left_number, right_number
+    return (left > right) - (left < right)
+
+
+def _sort_key(order):
+    def key(record):
+        value = record.findtext(order) or ''
+        number = _number(value)
+        return (0, number, '') if number is not None else (1, 0, value)
+    return key
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PrestaShopSimulator'
+    # the headers and the body are written separately
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def simulator(self):
+        return self.server.simulator
+
+    def _send(self, status, root=None, headers=None):
+        body = b''
+        if root is not None:
+            body = ElementTree.tostring(root, encoding='UTF-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('psws-version', PSWS_VERSION)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status, message, code=None):
+        root = ElementTree.Element('prestashop')
+        error = ElementTree.SubElement(
+            ElementTree.SubElement(root, 'errors'), 'error')
+        ElementTree.SubElement(error, 'code').text = str(code or status)
+        ElementTree.SubElement(error, 'message').text = message
+        self._send(status, root)
+
+    def _authenticated(self):
+        header = self.headers.get('Authorization', '')
+        if header.startswith('Basic '):
+            credentials = base64.b64decode(header[6:]).decode('utf-8')
+            if credentials.split(':', 1)[0] == self.simulator.api_key:
+                return True
+        return dict(self.query).get('ws_key') == self.simulator.api_key
+
+    def _read_record(self, resource):
+        length = int(self.headers.get('Content-Length') or 0)
+        content = self.rfile.read(length)
+        try:
+            root = ElementTree.fromstring(content)
+            record = root[0]
+        except (ElementTree.ParseError, IndexError):
+            return None
+        if record.tag != TAGS[resource]:
+            return None
+        return record
+
+    def _route(self):
+        """Return (resource, id) of the request, after the checks."""
+        parsed = urlparse(self.path)
+        self.query = parse_qsl(parsed.query, keep_blank_values=True)
+        path = parsed.path.split('/api', 1)[-1].strip('/')
+        parts = path.split('/') if path else []
+        resource = parts[0] if parts else None
+        record_id = None
+        if len(parts) > 1:
+            try:
+                record_id = int(parts[1])
+            except ValueError:
+                record_id = -1
+        return resource, record_id
+
+    def _handle(self):
+        simulator = self.simulator
+        simulator.count_request()
+        if simulator.latency:
+            time.sleep(simulator.latency)
+        resource, record_id = self._route()
+        if not self._authenticated():
+            self.send_response(401)
+            self.send_header('Content-Length', '0')
+            self.send_header('WWW-Authenticate', 'Basic realm="Webservice"')
+            self.end_headers()
+            return
+        if simulator.should_fail():
+            return self._error(500, 'Injected error')
+        if resource is None:
+            return self._root()
+        if resource not in TAGS:
+            return self._error(400, 'Resource of type "%s" does not exists'
+                               % (resource,), code=22)
+        if record_id == -1:
+            return self._error(400, 'Invalid id')
+        getattr(self, '_%s' % self.command.lower())(resource, record_id)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = _handle
+
+    def _root(self):
+        root = ElementTree.Element('prestashop')
+        api = ElementTree.SubElement(root, 'api', shopName='Simulator')
+        for resource in sorted(TAGS):
+            ElementTree.SubElement(api, resource, {
+                XLINK_HREF: '%s/%s' % (self.simulator.api_url, resource),
+                'get': 'true', 'put': 'true', 'post': 'true',
+                'delete': 'true', 'head': 'true'})
+        self._send(200, root)
+
+    def _wrap(self, element):
+        root = ElementTree.Element('prestashop')
+        root.append(element)
+        return root
+
+    def _get(self, resource, record_id):
+        catalog = self.simulator.catalog
+        options = dict(self.query)
+        if 'schema' in options:
+            if options['schema'] == 'synopsis':
+                return self._send(200, self._wrap(catalog.synopsis(resource)))
+            return self._send(200, self._wrap(catalog.template(resource)))
+        if record_id is not None:
+            record = catalog.records[resource].get(record_id)
+            if record is None:
+                return self._error(404, 'Id %s not found' % (record_id,))
+            return self._send(200, self._wrap(record))
+        return self._send(200, self._wrap(self._listing(resource)))
+
+    _head = _get
+
+    def _listing(self, resource):
+        catalog = self.simulator.catalog
+        with catalog.lock:
+            records = list(catalog.records[resource].values())
+        for key, condition in self.query:
+            found = re.match(r'^filter\[(\w+)\]$', key)
+            if found:
+                field = found.group(1)
+                records = [record for record in records
+                           if _match(record.findtext(field) or '',
+                                     condition)]
+        orders = dict(self.query).get('sort')
+        if orders:
+            for order in reversed(orders.strip('[]').split(',')):
+                field, _, direction = order.rpartition('_')
+                records.sort(key=_sort_key(field),
+                             reverse=direction == 'DESC')
+        limit = dict(self.query).get('limit')
+        if limit:
+            if ',' in limit:
+                offset, count = (int(part) for part in limit.split(','))
+            else:
+                offset, count = 0, int(limit)
+            records = records[offset:offset + count]
+
+        listing = ElementTree.Element(resource)
+        display = dict(self.query).get('display')
+        tag = TAGS[resource]
+        for record in records:
+            if display == 'full':
+                listing.append(record)
+            elif display:
+                fields = display.strip('[]').split(',')
+                element = ElementTree.SubElement(listing, tag)
+                for field in record:
+                    if field.tag in fields:
+                        element.append(field)
+            else:
+                record_id = record.findtext('id')
+                ElementTree.SubElement(listing, tag, {
+                    'id': record_id,
+                    XLINK_HREF: '%s/%s/%s' % (self.simulator.api_url,
+                                              resource, record_id)})
+        return listing
+
+    def _post(self, resource, record_id):
+        record = self._read_record(resource)
+        if record is None:
+            return self._error(400, 'Invalid XML')
+        record = self.simulator.catalog.add(resource, record)
+        self._send(201, self._wrap(record))
+
+    def _put(self, resource, record_id):
+        record = self._read_record(resource)
+        if record is None:
+            return self._error(400, 'Invalid XML')
+        if record_id is None:
+            try:
+                record_id = int(record.findtext('id'))
+            except (TypeError, ValueError):
+                return self._error(400, 'Id is required when modifying')
+        record = self.simulator.catalog.edit(resource, record_id, record)
+        if record is None:
+            return self._error(404, 'Id %s not found' % (record_id,))
+        self._send(200, self._wrap(record))
+
+    def _delete(self, resource, record_id):
+        if record_id is not None:
+            record_ids = [record_id]
+        else:
+            ids = dict(self.query).get('id', '')
+            try:
+                record_ids = [int(part) for part in ids.strip('[]').split(',')]
+            except ValueError:
+                return self._error(400, 'Invalid ids')
+        if not self.simulator.catalog.delete(resource, record_ids):
+            return self._error(404, 'Id not found')
+        self._send(200)
+
+
+class Simulator(object):
+    """HTTP server simulating the webservice, in a background thread."""
+
+    def __init__(self, products=1000, languages=(1, 2, 3), latency=0.0,
+                 error_rate=0.0, api_key=API_KEY, host='127.0.0.1', port=0,
+                 seed=0):
+        """
+        :param products: number of products of the catalog
+        :param languages: ids of the languages of the multilingual fields
+        :param latency: seconds waited before each response
+        :param error_rate: fraction of the requests failing with a 500
+        :param api_key: key accepted by the simulator
+        :param port: port of the server, a free one by default
+        :param seed: seed of the random errors
+        """
+        self.catalog = Catalog(products, languages)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.api_key = api_key
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.server.simulator = self
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://%s:%d/api' % (host, port)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8080
+    simulator = Simulator(products=products, port=port)
+    print('%s key %s, %d products' % (simulator.api_url, simulator.api_key,
+                                      products))
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        simulator.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,3 +2,17 @@ from .prestapyt import PrestaShopWebService
 from .prestapyt import PrestaShopWebServiceDict
 from .prestapyt import PrestaShopWebServiceError
 from .prestapyt import PrestaShopAuthenticationError
+from .batch import BatchResult
+from .cache import RecordCache
+from .cache import ResponseCache
+from .metrics import MetricsCollector
+from .images import ImageUploader
+from .multishop import MultiShopClient
+from .multishop import ShopTarget
+from .query import Query
+from .sync import IncrementalSync
+from .sync import WatermarkStore
+from .retry import RateLimiter
+from .retry import RetryPolicy
+from .aio import AsyncPrestaShopWebService
+from .aio import AsyncPrestaShopWebServiceDict
@@ -0,0 +1,448 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Asyncio clients for the PrestaShop Web Service API.
+
+They share the url building, options validation, error mapping and
+XML / dict parsing of the synchronous clients through a common base
+class, not their public methods: only the methods defined here are
+available and the network calls are awaitable. The transport doing
+the HTTP requests is pluggable:
+any object with an awaitable `request(method, url, data, headers)`
+returning an object with `status_code`, `headers` and `content`.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import asyncio
+import functools
+
+from . import dict2xml
+from . import xml2dict
+from .prestapyt import PrestaShopWebServiceError
+from .prestapyt import _PrestaShopWebServiceBase
+from .prestapyt import _listing_elements
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse(object):
+    """Response returned by the transports."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class RequestsTransport(object):
+    """Run the requests of a requests Session in the loop's executor.
+
+    Used when aiohttp is not installed.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def request(self, method, url, data=None, headers=None):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.session.request, method, url,
+                                 data=data, headers=headers)
+        return await loop.run_in_executor(None, call)
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(object):
+    """Native asyncio transport using an aiohttp ClientSession."""
+
+    def __init__(self, api_key, limit=10):
+        if aiohttp is None:
+            raise PrestaShopWebServiceError(
+                'aiohttp is required for the AiohttpTransport'
+            )
+        self.api_key = api_key
+        self.limit = limit
+        self.session = None
+
+    async def request(self, method, url, data=None, headers=None):
+        if self.session is None:
+            # the session must be created within the running loop
+            self.session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.api_key, ''),
+                connector=aiohttp.TCPConnector(limit=self.limit),
+            )
+        async with self.session.request(method, url, data=data,
+                                        headers=headers) as response:
+            content = await response.read()
+            return AsyncResponse(response.status, response.headers, content)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncPrestaShopWebService(_PrestaShopWebServiceBase):
+    """Interact with the PrestaShop WebService API with asyncio.
+
+    Use XML for messages. The public methods are coroutines.
+    """
+
+    def __init__(self, api_url, api_key, debug=False, session=None,
+                 verbose=False, transport=None, max_concurrency=10):
+        """
+        Create an instance of AsyncPrestaShopWebService.
+
+        async with AsyncPrestaShopWebService(
+                'http://localhost:8080/api',
+                'BVWPFFYBT97WKM959D7AVVD0M4815Y1L') as prestashop:
+            await prestashop.get('addresses', 1)
+
+        :param api_url: Root URL for the shop
+        :param api_key: Authentification key
+        :param debug: activate PrestaShop's webservice debug mode
+        :param session: pass a custom requests Session, used by the
+            default transport when aiohttp is not installed
+        :param verbose: not used by the asyncio clients
+        :param transport: object doing the HTTP requests, default is an
+            AiohttpTransport when aiohttp is installed,
+            else a RequestsTransport
+        :param max_concurrency: maximum number of requests in flight
+        """
+        super(AsyncPrestaShopWebService, self).__init__(
+            api_url, api_key, debug=debug, session=session, verbose=verbose)
+        if transport is None:
+            if aiohttp is not None and session is None:
+                transport = AiohttpTransport(api_key, limit=max_concurrency)
+            else:
+                transport = RequestsTransport(self.client)
+        self.transport = transport
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the transport."""
+        await self.transport.close()
+
+    async def _execute(self, url, method, data=None, add_headers=None):
+        """Execute a request on the PrestaShop Webservice.
+
+        :param url: full url to call
+        :param method: GET, POST, PUT, DELETE, HEAD
+        :param data: for PUT (edit) and POST (add) only,
+                     the xml sent to PrestaShop
+        :param add_headers: additional headers of the request
+        :return: the response of the transport
+        """
+        if self._semaphore is None:
+            # created lazily to be bound to the running loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            response = await self.transport.request(
+                method, url, data=data, headers=add_headers or {})
+
+        self._check_status_code(response.status_code, response.content)
+        self._check_version(response.headers.get('psws-version'))
+        return response
+
+    async def add(self, resource, content=None, files=None, options=None):
+        """Add (POST) a resource. Content can be a dict of values to create.
+
+        :param resource: type of resource to create
+        :param content: Full XML as string of new resource.
+        :param files: a sequence of (type, filename, value) elements
+            for data to be uploaded as files.
+        :return: an ElementTree of the response from the web service
+        """
+        full_url = self._build_url(resource, options=options)
+        return await self.add_with_url(full_url, content, files)
+
+    async def add_with_url(self, url, xml=None, files=None):
+        """Add (POST) a resource.
+
+        :param url: A full URL which for the resource type to create
+        :param xml: Full XML as string of new resource.
+        :param files: a sequence of (type, filename, value)
+            elements for data to be uploaded as files.
+        :return: an ElementTree of the response from the web service
+        """
+        if files is not None:
+            headers, data = self.encode_multipart_formdata(files)
+            response = await self._execute(url, 'POST', data=data,
+                                           add_headers=headers)
+        elif xml is not None:
+            headers = {'Content-Type': 'text/xml'}
+            response = await self._execute(url, 'POST', data=xml,
+                                           add_headers=headers)
+        else:
+            raise PrestaShopWebServiceError('Undefined data.')
+        return self._parse(response.content)
+
+    async def search(self, resource, options=None):
+        """Retrieve (GET) a resource and return the xml with the ids.
+
+        :param resource: string of the resource
+            to search like 'addresses', 'products'
+        :param options: optional dict of parameters to filter the search
+            (one or more of 'filter', 'display', 'sort', 'limit', 'schema')
+        :return: ElementTree of the xml message
+        """
+        return await self.get(resource, options=options)
+
+    async def get(self, resource, resource_id=None, options=None):
+        """Retrieve (GET) a resource.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional resource id to retrieve
+        :param options: Optional dict of parameters (one or more of
+                        'filter', 'display', 'sort', 'limit', 'schema')
+        :return: an ElementTree of the response
+        """
+        full_url = self._build_url(resource, resource_id, options)
+        return await self.get_with_url(full_url)
+
+    async def get_with_url(self, url):
+        """Retrieve (GET) a resource from a full URL.
+
+        :param url: URL which explicitly set resource type and ID to retrieve
+        :return: an ElementTree of the resource
+        """
+        response = await self._execute(url, 'GET')
+        return self._parse(response.content)
+
+    async def head(self, resource, resource_id=None, options=None):
+        """Head method (HEAD) a resource.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional resource id to retrieve
+        :param options: optional dict of parameters
+            (one or more of 'filter', 'display', 'sort', 'limit', 'schema')
+        :return: the header of the response as a dict
+        """
+        full_url = self._build_url(resource, resource_id, options)
+        return await self.head_with_url(full_url)
+
+    async def head_with_url(self, url):
+        """Head method (HEAD) a resource from a full URL.
+
+        :param url: URL which explicitly set resource type and ID to retrieve
+        :return: the header of the response as a dict
+        """
+        response = await self._execute(url, 'HEAD')
+        return response.headers
+
+    async def edit(self, resource, content, options=None):
+        """Edit (PUT) a resource.
+
+        :param resource: type of resource to edit
+        :param content: modified XML as string of the resource.
+        :return: an ElementTree of the Webservice's response
+        """
+        full_url = self._build_url(resource, options=options or None)
+        return await self.edit_with_url(full_url, content)
+
+    async def edit_with_url(self, url, content):
+        """Edit (PUT) a resource from a full URL.
+
+        :param url: an full url to edit a resource
+        :param content: modified XML as string of the resource.
+        :return: an ElementTree of the Webservice's response
+        """
+        headers = {'Content-Type': 'text/xml'}
+        response = await self._execute(url, 'PUT', data=content,
+                                       add_headers=headers)
+        return self._parse(response.content)
+
+    async def delete(self, resource, resource_ids):
+        """Delete (DELETE) a resource.
+
+        :param resource: type of resource to retrieve
+        :param resource_ids: int or list of ids to delete
+        :return: True if delete is done,
+            raise an error PrestaShopWebServiceError if missed
+        """
+        return await self.delete_with_url(
+            self._delete_url(resource, resource_ids))
+
+    async def delete_with_url(self, url):
+        """Delete (DELETE) a resource.
+
+        :param url: full URL to delete a resource
+        :return: True if delete is done,
+            raise an error PrestaShopWebServiceError if missed
+        """
+        await self._execute(url, 'DELETE')
+        return True
+
+
+class AsyncPrestaShopWebServiceDict(AsyncPrestaShopWebService):
+    """Interact with the PrestaShop WebService API with asyncio.
+
+    Use dict for messages. The public methods are coroutines.
+    """
+
+    async def search(self, resource, options=None):
+        """Retrieve (GET) a resource and return a list of its ids.
+
+        :param resource: string of the resource to search like,
+            ie: 'addresses', 'products', 'manufacturers', etc.
+        :param options: optional dict of parameters to filter the search
+            (one or more of 'filter', 'display', 'sort', 'limit', 'schema')
+        :return: list of ids as int
+        """
+        response = await super(
+            AsyncPrestaShopWebServiceDict, self).search(resource,
+                                                        options=options)
+        return [int(elem['attrs']['id'])
+                for elem in _listing_elements(response)]
+
+    async def iter_search(self, resource, options=None, page_size=1000,
+                          prefetch=False):
+        """Retrieve the ids of a resource page by page.
+
+        :param resource: string of the resource to search like,
+            ie: 'addresses', 'products', 'manufacturers', etc.
+        :param options: optional dict of parameters to filter the search
+            (one or more of 'filter', 'display', 'sort', 'schema'),
+            'limit' is driven by the pagination and can not be given
+        :param page_size: number of ids requested per page
+        :param prefetch: request the next page while the current
+            one is consumed
+        :return: asynchronous generator of ids as int
+        """
+        pages = self._iter_pages(resource, options, page_size, prefetch)
+        async for elems in pages:
+            for elem in elems:
+                yield int(elem['attrs']['id'])
+
+    async def iter_get(self, resource, options=None, page_size=100,
+                       prefetch=False):
+        """Retrieve (GET) the records of a resource page by page.
+
+        When no 'display' option is given, 'full' is used.
+
+        :param resource: type of resource to retrieve
+        :param options: optional dict of parameters
+            (one or more of 'filter', 'display', 'sort', 'schema'),
+            'limit' is driven by the pagination and can not be given
+        :param page_size: number of records requested per page
+        :param prefetch: request the next page while the current
+            one is consumed
+        :return: asynchronous generator of records as dict
+        """
+        options = dict(options or {})
+        options.setdefault('display', 'full')
+        pages = self._iter_pages(resource, options, page_size, prefetch)
+        async for elems in pages:
+            for elem in elems:
+                yield elem
+
+    async def _iter_pages(self, resource, options, page_size, prefetch):
+        """Yield the elements of a listing, one list per page.
+
+        :param resource: type of resource to retrieve
+        :param options: dict of parameters of the listing
+        :param page_size: number of elements requested per page
+        :param prefetch: request the next page while the current
+            one is consumed
+        :return: asynchronous generator of lists of elements
+        """
+        options = dict(options or {})
+        if 'limit' in options:
+            raise PrestaShopWebServiceError(
+                "The 'limit' option can not be used with pagination"
+            )
+        if page_size < 1:
+            raise PrestaShopWebServiceError('page_size must be positive')
+
+        async def fetch(offset):
+            page_options = dict(options,
+                                limit='%d,%d' % (offset, page_size))
+            response = await self.get(resource, options=page_options)
+            return _listing_elements(response)
+
+        offset = 0
+        task = asyncio.ensure_future(fetch(offset))
+        try:
+            while task is not None:
+                elems = await task
+                offset += page_size
+                if len(elems) < page_size:
+                    task = None
+                elif prefetch:
+                    task = asyncio.ensure_future(fetch(offset))
+                else:
+                    task = fetch(offset)
+                if elems:
+                    yield elems
+        finally:
+            if task is not None:
+                if asyncio.isfuture(task):
+                    task.cancel()
+                else:
+                    task.close()
+
+    async def get_with_url(self, url):
+        """Retrieve (GET) a resource from a full URL.
+
+        :param url: URL which explicitly set resource type and ID to retrieve
+        :return: a dict of the response.
+            Remove root keys ['prestashop'] from the message
+        """
+        response = await super(
+            AsyncPrestaShopWebServiceDict, self).get_with_url(url)
+        if isinstance(response, dict):
+            return response['prestashop']
+        else:
+            return response
+
+    async def add_with_url(self, url, content=None, files=None):
+        """Add (POST) a resource.
+
+        :param url: A full URL which for the resource type to create
+        :param content: dict of new resource values.
+            It will be converted to XML with the necessary root tag ie:
+            <prestashop>[[dict converted to xml]]</prestashop>
+        :param files: a sequence of (type, filename, value) elements
+            for data to be uploaded as files.
+        :return: a dict of the response from the web service
+        """
+        if content is not None and isinstance(content, dict):
+            xml_content = dict2xml.dict2xml({'prestashop': content})
+        else:
+            xml_content = content
+        _super = super(AsyncPrestaShopWebServiceDict, self)
+        return await _super.add_with_url(url, xml_content, files)
+
+    async def edit_with_url(self, url, content):
+        """Edit (PUT) a resource from a full URL.
+
+        :param url: an full url to edit a resource
+        :param content: modified dict of the resource.
+        :return: a dict of the Webservice's response
+        """
+        xml_content = dict2xml.dict2xml({'prestashop': content})
+        _super = super(AsyncPrestaShopWebServiceDict, self)
+        return await _super.edit_with_url(url, xml_content)
+
+    def _parse(self, content):
+        """Parse the response of the webservice, assumed to be a XML in utf-8.
+
+        :param content: response from the webservice
+        :return: a dict of the content
+        """
+        parsed_content = super(AsyncPrestaShopWebServiceDict,
+                               self)._parse(content)
+        return xml2dict.ET2dict(parsed_content)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Helpers to run many webservice calls concurrently.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import threading
+
+from collections import deque
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+BatchResult = namedtuple('BatchResult', ['key', 'result', 'error'])
+BatchResult.__doc__ = """Outcome of one item of a batch.
+
+:param key: the item the call was made for (id, chunk of ids, ...)
+:param result: value returned by the call, None if it failed
+:param error: exception raised by the call, None if it succeeded
+"""
+
+
+def iter_concurrently(func, items, max_workers=8, ordered=True,
+                      max_pending=None, errors=(Exception,)):
+    """Call func on each item in a pool of threads.
+
+    The items are consumed lazily: at most `max_pending` calls are
+    submitted at once, so `items` can be a generator of any size.
+
+    :param func: callable taking an item
+    :param items: iterable of items
+    :param max_workers: number of threads
+    :param ordered: yield the results in the order of the items,
+        otherwise as they complete
+    :param max_pending: maximum number of calls submitted and not yet
+        yielded, default twice `max_workers`
+    :param errors: exceptions which are collected in the results,
+        the other ones are propagated
+    :return: generator of BatchResult(item, result, error)
+    """
+    if max_pending is None:
+        max_pending = max_workers * 2
+
+    def call(item):
+        try:
+            return BatchResult(item, func(item), None)
+        except errors as err:
+            return BatchResult(item, None, err)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for item in items:
+            if len(pending) >= max_pending:
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, not_done = wait(pending,
+                                          return_when=FIRST_COMPLETED)
+                    pending = deque(not_done)
+                    for future in done:
+                        yield future.result()
+            pending.append(executor.submit(call, item))
+        while pending:
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending = deque(not_done)
+                for future in done:
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+class _Flight(object):
+    """A call in progress and the callers waiting for its result."""
+
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight(object):
+    """Coalesce the concurrent calls made with the same key.
+
+    The first caller of a key runs the call, the callers arriving while
+    it is in progress wait for it and get its result (or its error)
+    instead of running the call again.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.saved = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, copy=None):
+        """Run func, or wait for the call in progress for the same key.
+
+        :param key: key of the call, ie: the url of a request
+        :param func: callable without argument
+        :param copy: optional function copying the result, when the
+            result is shared each caller gets its own copy
+        :return: the result of func
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+                self.calls += 1
+            else:
+                flight.followers += 1
+                leader = False
+                self.saved += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy(flight.result) if copy else flight.result
+        try:
+            flight.result = func()
+        except Exception as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                shared = flight.followers > 0
+            flight.done.set()
+        # the followers copy the result while the leader uses its own
+        if shared and copy:
+            return copy(flight.result)
+        return flight.result
+
+    def stats(self):
+        """Counters of the calls run and saved, as a dict."""
+        with self._lock:
+            return {'calls': self.calls, 'saved': self.saved,
+                    'in_flight': len(self._flights)}
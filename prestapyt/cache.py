@@ -0,0 +1,442 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Caches of the webservice: the responses in memory, the records on disk.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from collections import namedtuple
+
+
+class CacheEntry(object):
+    """A cached response and its expiry date."""
+
+    __slots__ = ('resource', 'response', 'expires')
+
+    def __init__(self, resource, response, expires):
+        self.resource = resource
+        self.response = response
+        self.expires = expires
+
+    def is_fresh(self):
+        return time.monotonic() < self.expires
+
+    def validators(self):
+        """Headers of a conditional request revalidating the entry."""
+        headers = {}
+        etag = self.response.headers.get('ETag')
+        if etag:
+            headers['If-None-Match'] = etag
+        last_modified = self.response.headers.get('Last-Modified')
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """LRU cache of the responses of the GET requests, keyed by url.
+
+    Give it to a client to use it:
+
+        cache = ResponseCache(ttls={'countries': 3600, 'languages': 3600})
+        prestashop = PrestaShopWebServiceDict(api_url, api_key, cache=cache)
+
+    A stale entry is revalidated with a conditional request when the
+    server sent an ETag or a Last-Modified header. The entries of a
+    resource are dropped when it is added, edited or deleted through
+    the client.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=0, ttls=None):
+        """
+        :param max_entries: maximum number of responses kept, the least
+            recently used are evicted first
+        :param default_ttl: number of seconds a response of a resource
+            without ttl is fresh, 0 (default) to cache only the
+            resources of `ttls`
+        :param ttls: dict of resource: ttl overriding default_ttl,
+            ie: {'countries': 3600, 'orders': 0}
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl(self, resource):
+        """Number of seconds the responses of a resource are fresh."""
+        return self.ttls.get(resource, self.default_ttl)
+
+    def lookup(self, url):
+        """Return the entry of an url.
+
+        The entry may be stale, in such case it has to be revalidated
+        with its validators before being used.
+
+        :param url: full url of the request
+        :return: CacheEntry or None
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            if entry.is_fresh():
+                self.hits += 1
+                return entry
+            if entry.validators():
+                return entry
+            del self._entries[url]
+            self.misses += 1
+            return None
+
+    def store(self, url, resource, response):
+        """Keep the response of an url.
+
+        :param url: full url of the request
+        :param resource: resource of the url, ie: 'countries'
+        :param response: response of the request
+        """
+        ttl = self.ttl(resource)
+        if not ttl:
+            return
+        with self._lock:
+            if url in self._entries:
+                # a stale entry which could not be revalidated
+                self.misses += 1
+            self._entries[url] = CacheEntry(resource, response,
+                                            time.monotonic() + ttl)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, url, entry):
+        """The server confirmed a stale entry is still valid.
+
+        :param url: full url of the request
+        :param entry: the revalidated CacheEntry
+        """
+        with self._lock:
+            entry.expires = time.monotonic() + self.ttl(entry.resource)
+            self.hits += 1
+            self.revalidations += 1
+
+    def invalidate(self, resource=None):
+        """Drop the entries of a resource, or all of them.
+
+        :param resource: resource to drop, ie: 'countries'
+        """
+        with self._lock:
+            if resource is None:
+                self._entries.clear()
+                return
+            for url in [url for url, entry in self._entries.items()
+                        if entry.resource == resource]:
+                del self._entries[url]
+
+    def stats(self):
+        """Counters of the cache as a dict."""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+        }
+
+
+RecordScope = namedtuple('RecordScope', ['api_url', 'id_shop', 'typed'])
+RecordScope.__doc__ = """Origin of the records of a RecordCache.
+
+:param api_url: url of the webservice of the client
+:param id_shop: id of the shop of a multistore as string, '' if none
+:param typed: whether the records were read by a client in typed mode
+"""
+
+
+class RecordCache(object):
+    """Records kept in a SQLite file, shared by the runs of a program.
+
+    Give it to a PrestaShopWebServiceDict to use it:
+
+        records = RecordCache('/var/cache/myapp/records.sqlite')
+        prestashop = PrestaShopWebServiceDict(api_url, api_key,
+                                              record_cache=records)
+
+    Each record is kept with its 'date_upd'. A record is used without
+    request during `max_age` seconds after it was fetched or validated,
+    then it is validated by comparing its 'date_upd' with the one of the
+    shop, read for many records at once in a listing. The least recently
+    used records are evicted when the file exceeds `max_bytes`.
+
+    The records are stored by RecordScope: the cache can be shared by
+    clients of different shops, of the shops of a multistore or in
+    typed mode, each of them reads only its own records.
+
+    The records are pickled: the file must only be writable by the
+    program using it.
+    """
+
+    # version of the layout of the file, older files are emptied
+    SCHEMA_VERSION = 1
+    # condition selecting the records of a RecordScope
+    _SCOPE = 'api_url = ? AND id_shop = ? AND typed = ?'
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, max_age=60):
+        """
+        :param path: path of the SQLite file
+        :param max_bytes: maximum size of the pickled records
+        :param max_age: number of seconds a record is used without
+            being validated
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.validations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            version = self._db.execute('PRAGMA user_version').fetchone()[0]
+            if version < self.SCHEMA_VERSION:
+                # the records were not stored with their scope
+                self._db.execute('DROP TABLE IF EXISTS records')
+                self._db.execute(
+                    'PRAGMA user_version = %d' % self.SCHEMA_VERSION)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS records ('
+                ' api_url TEXT NOT NULL,'
+                ' id_shop TEXT NOT NULL,'
+                ' typed INTEGER NOT NULL,'
+                ' resource TEXT NOT NULL,'
+                ' id INTEGER NOT NULL,'
+                ' date_upd TEXT NOT NULL,'
+                ' data BLOB NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' validated REAL NOT NULL,'
+                ' last_access REAL NOT NULL,'
+                ' PRIMARY KEY (api_url, id_shop, typed, resource, id))'
+            )
+            self._db.execute(
+                'CREATE INDEX IF NOT EXISTS records_last_access'
+                ' ON records (last_access)'
+            )
+        self._bytes = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM records').fetchone()[0]
+
+    @staticmethod
+    def _placeholders(values):
+        return ','.join('?' * len(values))
+
+    @staticmethod
+    def _scope_params(scope):
+        return [scope.api_url, scope.id_shop, int(bool(scope.typed))]
+
+    def ids(self, scope, resource):
+        """Ids of the records of a resource in the cache.
+
+        :param scope: RecordScope of the records
+        :param resource: type of resource
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id FROM records WHERE %s AND resource = ?'
+                % self._SCOPE, self._scope_params(scope) + [resource])
+            return [row[0] for row in rows]
+
+    def entries(self, scope, resource, resource_ids):
+        """Validation data of the cached records.
+
+        :param scope: RecordScope of the records
+        :param resource: type of resource
+        :param resource_ids: list of ids as int
+        :return: dict of id: (date_upd, whether it is used without
+            validation)
+        """
+        entries = {}
+        limit = time.time() - self.max_age
+        params = self._scope_params(scope) + [resource]
+        with self._lock:
+            for start in range(0, len(resource_ids), 500):
+                chunk = resource_ids[start:start + 500]
+                rows = self._db.execute(
+                    'SELECT id, date_upd, validated FROM records'
+                    ' WHERE %s AND resource = ? AND id IN (%s)'
+                    % (self._SCOPE, self._placeholders(chunk)),
+                    params + chunk)
+                for record_id, date_upd, validated in rows:
+                    entries[record_id] = (date_upd, validated > limit)
+        return entries
+
+    def load(self, scope, resource, resource_ids):
+        """Records of the cache, the ids not found are ignored.
+
+        :param scope: RecordScope of the records
+        :param resource: type of resource
+        :param resource_ids: list of ids as int
+        :return: dict of id: record
+        """
+        records = {}
+        now = time.time()
+        with self._lock:
+            with self._db:
+                for start in range(0, len(resource_ids), 500):
+                    chunk = resource_ids[start:start + 500]
+                    params = self._scope_params(scope) + [resource] + chunk
+                    where = ' WHERE %s AND resource = ? AND id IN (%s)' % (
+                        self._SCOPE, self._placeholders(chunk))
+                    rows = self._db.execute(
+                        'SELECT id, data FROM records' + where, params)
+                    for record_id, data in rows:
+                        records[record_id] = pickle.loads(data)
+                    self._db.execute(
+                        'UPDATE records SET last_access = ?' + where,
+                        [now] + params)
+            self.hits += len(records)
+        return records
+
+    def missed(self, count):
+        """Count the records requested but not found, or not valid."""
+        with self._lock:
+            self.misses += count
+
+    def store(self, scope, resource, resource_id, date_upd, record):
+        """Keep a record.
+
+        :param scope: RecordScope of the record
+        :param resource: type of resource
+        :param resource_id: id of the record as int
+        :param date_upd: 'date_upd' of the record, '' if it has none
+        :param record: the record, as returned by the client
+        """
+        data = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        key = self._scope_params(scope) + [resource, resource_id]
+        with self._lock:
+            with self._db:
+                row = self._db.execute(
+                    'SELECT size FROM records'
+                    ' WHERE %s AND resource = ? AND id = ?' % self._SCOPE,
+                    key).fetchone()
+                self._db.execute(
+                    'INSERT OR REPLACE INTO records (api_url, id_shop, typed,'
+                    ' resource, id, date_upd, data, size, validated,'
+                    ' last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    key + [date_upd, sqlite3.Binary(data), len(data),
+                           now, now])
+            self._bytes += len(data) - (row[0] if row else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop the least recently used records until the size fits."""
+        with self._db:
+            # the file may be shared with other processes
+            self._bytes = self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+            rows = self._db.execute(
+                'SELECT rowid, size FROM records'
+                ' ORDER BY last_access').fetchall()
+            evicted = []
+            for rowid, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                evicted.append((rowid,))
+                self._bytes -= size
+            self._db.executemany(
+                'DELETE FROM records WHERE rowid = ?', evicted)
+        self.evictions += len(evicted)
+
+    def validated(self, scope, resource, resource_ids):
+        """The shop confirmed these records did not change."""
+        now = time.time()
+        params = self._scope_params(scope) + [resource]
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    'UPDATE records SET validated = ?'
+                    ' WHERE %s AND resource = ? AND id = ?' % self._SCOPE,
+                    [[now] + params + [record_id]
+                     for record_id in resource_ids])
+            self.validations += len(resource_ids)
+
+    def invalidate(self, api_url, resource, resource_ids=None):
+        """Forget records, or have all the records of a resource validated.
+
+        The records of all the shops of the webservice are concerned:
+        the shops of a multistore share the fields of their records.
+
+        :param api_url: url of the webservice
+        :param resource: type of resource
+        :param resource_ids: ids of the records to drop, when None the
+            records of the resource are validated before their next use
+        """
+        with self._lock:
+            with self._db:
+                if resource_ids is None:
+                    self._db.execute(
+                        'UPDATE records SET validated = 0'
+                        ' WHERE api_url = ? AND resource = ?',
+                        (api_url, resource))
+                    return
+                resource_ids = list(resource_ids)
+                for start in range(0, len(resource_ids), 500):
+                    chunk = resource_ids[start:start + 500]
+                    self._db.execute(
+                        'DELETE FROM records WHERE api_url = ?'
+                        ' AND resource = ? AND id IN (%s)'
+                        % self._placeholders(chunk),
+                        [api_url, resource] + chunk)
+            self._bytes = self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+
+    def clear(self, resource=None):
+        """Drop the records of a resource, all when None."""
+        with self._lock:
+            with self._db:
+                if resource is None:
+                    self._db.execute('DELETE FROM records')
+                else:
+                    self._db.execute(
+                        'DELETE FROM records WHERE resource = ?', (resource,))
+            self._bytes = self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+
+    def stats(self):
+        """Counters of the cache as a dict."""
+        return {
+            'entries': len(self),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'validations': self.validations,
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Conversion of the field values to Python types, from the formats
+declared in the 'synopsis' schema of the resources, ie:
+
+    <product>
+        <id_manufacturer format="isUnsignedId"></id_manufacturer>
+        <price required="true" format="isPrice"></price>
+        <date_add format="isDate"></date_add>
+        ...
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import datetime
+
+from decimal import Decimal
+from decimal import InvalidOperation
+
+EMPTY_DATES = ('0000-00-00', '0000-00-00 00:00:00')
+
+
+def to_int(value):
+    if value == '':
+        return None
+    return int(value)
+
+
+def to_decimal(value):
+    if value == '':
+        return None
+    return Decimal(value)
+
+
+def to_bool(value):
+    if value == '':
+        return None
+    return value not in ('0', 'false')
+
+
+def to_datetime(value):
+    if value == '' or value in EMPTY_DATES:
+        return None
+    if len(value) == 10:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+FORMATS = {
+    'isUnsignedId': to_int,
+    'isNullOrUnsignedId': to_int,
+    'isUnsignedInt': to_int,
+    'isInt': to_int,
+    'isPrice': to_decimal,
+    'isNegativePrice': to_decimal,
+    'isFloat': to_decimal,
+    'isUnsignedFloat': to_decimal,
+    'isOptFloat': to_decimal,
+    'isBool': to_bool,
+    'isDate': to_datetime,
+    'isDateFormat': to_datetime,
+    'isBirthDate': to_datetime,
+}
+
+
+def _lenient(converter):
+    """Keep the original string when it can not be converted."""
+    def convert(value):
+        try:
+            return converter(value)
+        except (ValueError, TypeError, InvalidOperation):
+            return value
+    return convert
+
+
+_CONVERTERS = dict((name, _lenient(converter))
+                   for name, converter in FORMATS.items())
+
+
+def field_converters(synopsis):
+    """Build the converters of a resource from its synopsis.
+
+    :param synopsis: synopsis schema as returned by the dict client,
+        ie: {'product': {'price': {'attrs': {'format': 'isPrice'},
+                                   'value': ''}, ...}}
+    :return: tuple (tag of the records, dict of field: converter)
+    """
+    if not isinstance(synopsis, dict) or not synopsis:
+        return None, {}
+    tag = list(synopsis.keys())[0]
+    fields = synopsis[tag]
+    converters = {'id': _CONVERTERS['isUnsignedId']}
+    if not isinstance(fields, dict):
+        return tag, converters
+    for field, description in fields.items():
+        if not isinstance(description, dict):
+            continue
+        attrs = description.get('attrs')
+        if not isinstance(attrs, dict):
+            continue
+        converter = _CONVERTERS.get(attrs.get('format'))
+        if converter is not None:
+            converters[field] = converter
+    return tag, converters
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compact representation of the records, built from the element tree.
+
+xml2dict represents a multilingual field with a dict per language
+and a list, a record uses a few dicts per field. A CompactRecord
+keeps the fields in the __slots__ of a class shared by the records
+having the same fields, the plain fields as strings and the
+multilingual fields in a LangValues:
+
+    product = prestashop.get_compact('products', 1)
+    product.reference
+    product.name[1]          # name in the language of id 1
+    product.to_dict()        # {'product': {...}} as returned by get()
+
+The fields which are neither plain nor multilingual (associations,
+fields with attributes) are kept as converted by xml2dict.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import keyword
+import re
+import threading
+
+from . import xml2dict
+
+
+class LangValues(object):
+    """Values of a multilingual field by language id."""
+
+    __slots__ = ('ids', 'values')
+
+    def __init__(self, ids, values):
+        """
+        :param ids: tuple of the language ids as strings
+        :param values: tuple of the values, in the order of the ids
+        """
+        self.ids = ids
+        self.values = values
+
+    def __getitem__(self, lang_id):
+        try:
+            return self.values[self.ids.index(str(lang_id))]
+        except ValueError:
+            raise KeyError(lang_id)
+
+    def get(self, lang_id, default=None):
+        try:
+            return self[lang_id]
+        except KeyError:
+            return default
+
+    def items(self):
+        return list(zip(self.ids, self.values))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __eq__(self, other):
+        return (isinstance(other, LangValues) and
+                self.ids == other.ids and self.values == other.values)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'LangValues(%r)' % (dict(self.items()),)
+
+    def to_dict(self):
+        """The field as converted by xml2dict."""
+        languages = [{'attrs': {'id': lang_id}, 'value': value}
+                     for lang_id, value in zip(self.ids, self.values)]
+        if len(languages) == 1:
+            return {'language': languages[0]}
+        return {'language': languages}
+
+
+class CompactRecord(object):
+    """Base class of the records, see `record_class`."""
+
+    __slots__ = ()
+    # tag of the record, ie: 'product'
+    _tag = None
+    # names of the fields, in the order of the document
+    _fields = ()
+    # name of the slot of each field
+    _slots = ()
+
+    def __init__(self, *values):
+        for slot, value in zip(self._slots, values):
+            setattr(self, slot, value)
+
+    @property
+    def fields(self):
+        return self._fields
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, self._slots[self._fields.index(field)])
+        except ValueError:
+            raise KeyError(field)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def values(self):
+        return [getattr(self, slot) for slot in self._slots]
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactRecord) and
+                self._tag == other._tag and
+                self._fields == other._fields and
+                self.values() == other.values())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<%s %s>' % (self._tag, ', '.join(
+            '%s=%r' % (field, value)
+            for field, value in zip(self._fields, self.values())))
+
+    def to_dict(self):
+        """The record as returned by the dict client, ie: {'product': {}}.
+
+        The result can be given to `edit` or dict2xml.
+        """
+        return {self._tag: dict(
+            (field, _value_to_dict(value))
+            for field, value in zip(self._fields, self.values()))}
+
+
+def _value_to_dict(value):
+    if isinstance(value, LangValues):
+        return value.to_dict()
+    if isinstance(value, list):
+        # the field was repeated in the record
+        return [_value_to_dict(item) for item in value]
+    return value
+
+
+_record_classes = {}
+_record_classes_lock = threading.Lock()
+
+
+def _slot_name(field):
+    slot = re.sub(r'\W', '_', field)
+    if not slot or slot[0].isdigit() or keyword.iskeyword(slot):
+        slot = '_' + slot
+    return slot
+
+
+def record_class(tag, fields):
+    """Class of the records of a tag having these fields.
+
+    The classes are created once and shared.
+
+    :param tag: tag of the record, ie: 'product'
+    :param fields: tuple of the field names
+    :return: a subclass of CompactRecord
+    """
+    key = (tag, fields)
+    cls = _record_classes.get(key)
+    if cls is None:
+        with _record_classes_lock:
+            cls = _record_classes.get(key)
+            if cls is None:
+                slots = tuple(_slot_name(field) for field in fields)
+                cls = type(str('%sRecord' % _slot_name(tag).title()),
+                           (CompactRecord,),
+                           {'__slots__': slots,
+                            '_tag': tag,
+                            '_fields': fields,
+                            '_slots': slots})
+                _record_classes[key] = cls
+    return cls
+
+
+def _is_plain(node):
+    """A field without children nor attributes (except xlink:href)."""
+    return (not len(node) and
+            all(attr == xml2dict._XLINK_HREF for attr in node.attrib))
+
+
+def _lang_values(node):
+    """LangValues of a multilingual field, None if it is not one."""
+    if not len(node):
+        return None
+    ids = []
+    values = []
+    for language in node:
+        if language.tag != 'language' or len(language):
+            return None
+        attrs = [attr for attr in language.attrib
+                 if attr != xml2dict._XLINK_HREF]
+        if attrs != ['id']:
+            return None
+        ids.append(language.attrib['id'])
+        text = language.text
+        values.append(text.strip() if text is not None else '')
+    return LangValues(tuple(ids), tuple(values))
+
+
+def _field_value(node):
+    if _is_plain(node):
+        text = node.text
+        return text.strip() if text is not None else ''
+    lang_values = _lang_values(node)
+    if lang_values is not None:
+        return lang_values
+    namespace, _ = xml2dict._split_tag(node.tag)
+    value = xml2dict._parse_node(node)
+    if namespace is not None:
+        value = {'value': value, 'xmlns': namespace}
+    return value
+
+
+def from_element(element):
+    """Build a CompactRecord from the element of a record.
+
+    :param element: element of a record, ie: <product>
+    :return: CompactRecord
+    """
+    fields = []
+    values = []
+    positions = {}
+    if any(attr != xml2dict._XLINK_HREF for attr in element.attrib):
+        fields.append('attrs')
+        values.append(xml2dict._node_attrs(element))
+    for child in element:
+        _, field = xml2dict._split_tag(child.tag)
+        value = _field_value(child)
+        if field in positions:
+            # repeated field, kept as a list as xml2dict does
+            position = positions[field]
+            if not isinstance(values[position], list):
+                values[position] = [values[position]]
+            values[position].append(value)
+            continue
+        positions[field] = len(fields)
+        fields.append(field)
+        values.append(value)
+    if not len(element):
+        text = element.text
+        fields.append('value')
+        values.append(text.strip() if text is not None else '')
+    cls = record_class(element.tag, tuple(fields))
+    return cls(*values)
+
+
+def from_tree(tree, listing=False):
+    """Build the CompactRecords of a response.
+
+    :param tree: root element of a response (<prestashop>)
+    :param listing: whether the response is a listing, ie:
+        <prestashop><products><product/>...</products></prestashop>
+        otherwise it is a single record <prestashop><product/></prestashop>
+    :return: list of CompactRecord for a listing, else a CompactRecord
+    """
+    if not listing:
+        return from_element(tree[0])
+    if not len(tree):
+        return []
+    return [from_element(element) for element in tree[0]]
@@ -11,6 +11,8 @@
 """
 
 from __future__ import unicode_literals
+import datetime
+from decimal import Decimal
 from xml.dom.minidom import getDOMImplementation
 from builtins import str
 
@@ -20,6 +22,27 @@ try:
 except ImportError:
     from past.types import basestring
 
+# types of the values written as the text of an element
+SIMPLE_TYPES = (float, int, Decimal, datetime.date, basestring)
+
+
+def _format_value(value):
+    """
+    Format a simple value the way PrestaShop reads it, the inverse of
+    the conversions of prestapyt.coercion
+    @param value: value of a simple type
+    @return: string
+    """
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, Decimal):
+        return format(value, 'f')
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
 
 def _process(doc, tag, tag_value):
     """
@@ -37,8 +60,7 @@ def _process(doc, tag, tag_value):
         tag_value = ''
 
     # Create a new node for simple values
-    if (isinstance(tag_value, (float, int)) or
-            isinstance(tag_value, basestring)):
+    if isinstance(tag_value, SIMPLE_TYPES):
         return _process_simple(doc, tag, tag_value)
 
     # Return a list of nodes with same tag
@@ -106,29 +128,169 @@ def _process_attr(doc, attr_value):
 
 def _process_simple(doc, tag, tag_value):
     """
-    Generate node for simple types (int, str)
+    Generate node for simple types (int, str, Decimal, date)
     @param doc: xml doc
     @param tag: tag
     @param tag_value: tag value
     @return: node
     """
     node = doc.createElement(tag)
-    node.appendChild(doc.createTextNode(str(tag_value)))
+    node.appendChild(doc.createTextNode(_format_value(tag_value)))
     return node
 
-def dict2xml(data, encoding='UTF-8'):
+def _escape_text(value):
+    """
+    Escape the text of an element
+    @param value: value as a string
+    @return: escaped string
+    """
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    return value
+
+def _escape_attr(value):
+    """
+    Escape the value of an attribute, the whitespaces are written as
+    character references, the parsers would normalize them to spaces
+    @param value: value as a string
+    @return: escaped string
+    """
+    value = _escape_text(value)
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    if '\t' in value:
+        value = value.replace('\t', '&#9;')
+    return value
+
+def _render_attrs(attrs, attr_value):
+    """
+    Collect the attributes of an element, the last one set wins
+    @param attrs: dict of attribute name: escaped value, updated in place
+    @param attr_value: attributes as found in the data
+    """
+    for attr_name, value in attr_value.items():
+        if isinstance(value, dict):
+            # namespace is not written, as with minidom
+            value = value.get('value', '')
+        attrs.pop(attr_name, None)
+        attrs[attr_name] = _escape_attr(str(value))
+
+def _start_tag(out, tag, attrs):
+    out.append('<')
+    out.append(tag)
+    for attr_name, value in attrs.items():
+        out.append(' %s="%s"' % (attr_name, value))
+
+def _render(out, tag, tag_value, extra_attrs=None):
+    """
+    Append the xml of tag: tag_value to out, mirrors _process
+
+    @param out: list of strings, the xml being built
+    @param tag: tag
+    @param tag_value: tag value
+    @param extra_attrs: list of attributes dicts set on the element
+                        after its own attributes
+    """
+    if isinstance(tag_value, dict) and list(tag_value.keys()) == ['value']:
+        tag_value = tag_value['value']
+
+    if tag_value is None:
+        tag_value = ''
+
+    if isinstance(tag_value, SIMPLE_TYPES):
+        attrs = {}
+        for attr_value in extra_attrs or ():
+            _render_attrs(attrs, attr_value)
+        _start_tag(out, tag, attrs)
+        out.append('>')
+        out.append(_escape_text(_format_value(tag_value)))
+        out.append('</%s>' % tag)
+        return
+
+    if isinstance(tag_value, list):
+        for value in tag_value:
+            _render(out, tag, value)
+        return
+
+    if isinstance(tag_value, dict):
+        if set(tag_value.keys()) == set(['attrs', 'value']):
+            _render(out, tag, tag_value['value'],
+                    [tag_value['attrs']] + (extra_attrs or []))
+            return
+        attrs = {}
+        if 'attrs' in tag_value:
+            _render_attrs(attrs, tag_value['attrs'])
+        for attr_value in extra_attrs or ():
+            _render_attrs(attrs, attr_value)
+        _start_tag(out, tag, attrs)
+        children = [(child_tag, child_value)
+                    for child_tag, child_value in tag_value.items()
+                    if child_tag != 'attrs']
+        if not children:
+            out.append('/>')
+            return
+        out.append('>')
+        for child_tag, child_value in children:
+            _render(out, child_tag, child_value)
+        out.append('</%s>' % tag)
+        return
+
+    raise TypeError('Unsupported value for tag %s: %r' % (tag, tag_value))
+
+def _dict2xml_minidom(data, encoding):
+    doc = getDOMImplementation().createDocument(None, None, None)
+    root, _ = _process_complex(doc, list(data.items()))
+    doc.appendChild(root[0])
+    return doc.toxml(encoding)
+
+def _dict2xml_fast(data, encoding):
+    if encoding is None:
+        out = ['<?xml version="1.0" ?>']
+    else:
+        out = ['<?xml version="1.0" encoding="%s"?>' % encoding]
+    for tag, tag_value in data.items():
+        if tag == 'attrs':
+            continue
+        while isinstance(tag_value, list):
+            tag_value = tag_value[0]
+        _render(out, tag, tag_value)
+        # only the first node is the root, as with minidom
+        break
+    xml = ''.join(out)
+    if encoding is None:
+        return xml
+    return xml.encode(encoding, 'xmlcharrefreplace')
+
+ENGINES = {
+    'fast': _dict2xml_fast,
+    'minidom': _dict2xml_minidom,
+}
+
+DEFAULT_ENGINE = 'fast'
+
+def dict2xml(data, encoding='UTF-8', engine=None):
     """
     Generate a xml string from a dict
     @param data:     data as a dict
     @param encoding: data encoding, default: UTF-8
+    @param engine:   serializer to use, 'fast' (string builder) or
+                     'minidom', default: DEFAULT_ENGINE
     @return: the data as a xml string
     """
-    doc = getDOMImplementation().createDocument(None, None, None)
     if len(data) > 1:
         raise Exception('Only one root node allowed')
-    root, _ = _process_complex(doc, list(data.items()))
-    doc.appendChild(root[0])
-    return doc.toxml(encoding)
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError('Unknown dict2xml engine: %s' % (engine,))
+    return ENGINES[engine](data, encoding)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Concurrent upload of images, skipping the files already uploaded.
+
+    uploader = ImageUploader(prestashop, manifest_path='images.json')
+    report = uploader.upload([(12, '/data/img/12-front.jpg'),
+                              (12, '/data/img/12-back.jpg'),
+                              (13, '/data/img/13.jpg')])
+    print(report)
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+from timeit import default_timer as timer
+
+import requests
+
+from urllib3.exceptions import MaxRetryError
+from urllib3.exceptions import NewConnectionError
+
+from . import batch
+from .prestapyt import PrestaShopWebServiceError
+from .prestapyt import _response_record_id
+
+SKIPPED = 'skipped'
+
+
+class UploadReport(object):
+    """Results and throughput of an upload."""
+
+    def __init__(self, results, elapsed):
+        """
+        :param results: list of BatchResult((id, path), image id, error),
+            the image id is SKIPPED for the unchanged files
+        :param elapsed: duration of the upload in seconds
+        """
+        self.results = results
+        self.elapsed = elapsed
+        self.uploaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        for result in results:
+            if result.error is not None:
+                self.failed += 1
+            elif result.result == SKIPPED:
+                self.skipped += 1
+            else:
+                self.uploaded += 1
+                self.bytes += os.path.getsize(result.key[1])
+
+    @property
+    def errors(self):
+        return [result for result in self.results if result.error]
+
+    @property
+    def files_per_second(self):
+        return self.uploaded / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return ('<UploadReport uploaded=%d skipped=%d failed=%d '
+                '%.1f files/s %.1f MB/s>' % (
+                    self.uploaded, self.skipped, self.failed,
+                    self.files_per_second, self.bytes_per_second / 1e6))
+
+
+class ImageUploader(object):
+    """Upload images concurrently through a client.
+
+    The hash of each uploaded file and the id of the image created
+    are kept in a local JSON manifest, a file is uploaded again only
+    when its content changed. The new image replaces the previous one,
+    which is deleted once the new one is uploaded.
+    """
+
+    def __init__(self, client, resource='images/products',
+                 manifest_path=None, max_workers=4, retries=2,
+                 backoff_factor=0.5):
+        """
+        :param client: PrestaShopWebService or PrestaShopWebServiceDict
+        :param resource: images endpoint, the id of the item is appended,
+            ie: 'images/products', 'images/categories',
+            'images/manufacturers'
+        :param manifest_path: optional path of the manifest of the
+            files already uploaded, no file is skipped without it
+        :param max_workers: number of concurrent uploads
+        :param retries: number of retries of a request failing with a
+            transient error, an upload is only retried when it could
+            not be sent; no retry is done by the uploader when the
+            client has its own retry policy
+        :param backoff_factor: the n-th retry waits
+            backoff_factor * 2 ** (n - 1) seconds
+        """
+        self.client = client
+        self.resource = resource.strip('/')
+        self.manifest_path = manifest_path
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        with io.open(self.manifest_path, 'r', encoding='utf-8') as fd:
+            return json.load(fd)
+
+    def save_manifest(self):
+        """Write the manifest, replacing the previous one atomically."""
+        if not self.manifest_path:
+            return
+        tmp_path = self.manifest_path + '.tmp'
+        with self._lock:
+            with io.open(tmp_path, 'w', encoding='utf-8') as fd:
+                json.dump(self.manifest, fd, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def file_hash(path, chunk_size=65536):
+        """SHA-1 of the content of a file, read by chunks."""
+        digest = hashlib.sha1()
+        with io.open(path, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _manifest_key(self, item_id, path):
+        return '%s/%s|%s' % (self.resource, item_id, os.path.abspath(path))
+
+    def upload(self, items):
+        """Upload images, skipping the ones unchanged since the last upload.
+
+        :param items: iterable of (id, path), the id being the id of the
+            product (or category, ...) of the image
+        :return: UploadReport
+        """
+        self.client._ensure_pool_size(self.max_workers)
+        start = timer()
+        try:
+            results = list(batch.iter_concurrently(
+                self._upload_item, items,
+                max_workers=self.max_workers,
+                errors=(PrestaShopWebServiceError,
+                        requests.exceptions.RequestException,
+                        EnvironmentError),
+            ))
+        finally:
+            self.save_manifest()
+        return UploadReport(results, timer() - start)
+
+    def _upload_item(self, item):
+        item_id, path = item
+        key = self._manifest_key(item_id, path)
+        digest = self.file_hash(path)
+        with self._lock:
+            entry = self.manifest.get(key)
+        if not isinstance(entry, dict):
+            # manifests of previous versions only kept the hash
+            entry = {'hash': entry, 'image_id': None, 'stale': []}
+        endpoint = '%s/%s' % (self.resource, item_id)
+        result = SKIPPED
+        if entry['hash'] != digest:
+            result = self._upload_file(endpoint, path)
+            stale = list(entry.get('stale', []))
+            if entry['image_id'] is not None and entry['image_id'] != result:
+                stale.append(entry['image_id'])
+            entry = {'hash': digest, 'image_id': result, 'stale': stale}
+            with self._lock:
+                self.manifest[key] = entry
+        # the images replaced by a new upload, kept in the manifest
+        # until they are deleted
+        for image_id in list(entry.get('stale', [])):
+            self._delete_image(endpoint, image_id)
+            with self._lock:
+                entry['stale'].remove(image_id)
+        return result
+
+    def _upload_file(self, endpoint, path):
+        """Upload a file, retrying on transient errors.
+
+        :return: id of the image created, None if unknown
+        """
+        response = self._retry(
+            lambda: self.client.add(endpoint, files=[('image', path)]),
+            idempotent=False)
+        return self._image_id(response)
+
+    def _delete_image(self, endpoint, image_id):
+        """Delete the previous image of a file, already gone is fine."""
+        try:
+            self._retry(lambda: self.client.delete(endpoint, image_id))
+        except PrestaShopWebServiceError as err:
+            if err.error_code != 404:
+                raise
+
+    def _retry(self, func, idempotent=True):
+        """Call func, retrying on transient errors.
+
+        A request which is not idempotent (the POST of an upload) is
+        only retried when the connection to the shop failed: after a
+        server error or a broken connection the image may have been
+        created, a new upload would create a second one.
+
+        :param func: function sending the request
+        :param idempotent: whether the request can be sent again
+            after a server error (5xx) or a connection error
+        """
+        retries = self.retries
+        if getattr(self.client, 'retry', None) is not None:
+            # retried by the client, the attempts would multiply
+            retries = 0
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as err:
+                if attempt >= retries or not (idempotent or _not_sent(err)):
+                    raise
+            except PrestaShopWebServiceError as err:
+                if (attempt >= retries or not idempotent or
+                        not (err.error_code or 0) >= 500):
+                    raise
+            attempt += 1
+            time.sleep(self.backoff_factor * 2 ** (attempt - 1))
+
+    @staticmethod
+    def _image_id(response):
+        try:
+            if isinstance(response, dict):
+                return _response_record_id(response)
+            node = response.find('image/id')
+            return int(node.text)
+        except (AttributeError, KeyError, IndexError, TypeError,
+                ValueError):
+            return None
+
+
+def _not_sent(err):
+    """Whether a requests exception happened before the request was sent."""
+    if isinstance(err, requests.exceptions.ConnectTimeout):
+        return True
+    reason = err.args[0] if err.args else None
+    return (isinstance(reason, MaxRetryError) and
+            isinstance(reason.reason, NewConnectionError))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Instrumentation of the webservice requests.
+
+The clients fire hooks with a RequestEvent describing the request:
+
+- before_request: before the request is sent
+- after_response: the response is received (or found in the cache)
+- after_parse: the response is parsed (XML, then dict for the dict client)
+- on_error: the request or the parse failed, `event.error` is set
+
+    def log_slow(event):
+        if event.network_time > 1:
+            _logger.warning('%s %s took %.1fs', event.method, event.url,
+                            event.network_time)
+
+    prestashop.add_hook('after_response', log_slow)
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import threading
+
+from collections import defaultdict
+from collections import deque
+
+HOOKS = ('before_request', 'after_response', 'after_parse', 'on_error')
+
+
+class RequestEvent(object):
+    """Data of a request, filled along its execution.
+
+    Times are in seconds, None until measured.
+    """
+
+    __slots__ = ('method', 'url', 'resource', 'status_code', 'bytes',
+                 'cached', 'network_time', 'parse_time', 'convert_time',
+                 'error')
+
+    def __init__(self, method, url, resource):
+        self.method = method
+        self.url = url
+        self.resource = resource
+        self.status_code = None
+        self.bytes = None
+        self.cached = False
+        self.network_time = None
+        self.parse_time = None
+        self.convert_time = None
+        self.error = None
+
+    def __repr__(self):
+        return '<RequestEvent %s %s %s>' % (self.method, self.url,
+                                            self.status_code)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers, None if empty.
+
+    :param samples: list of numbers
+    :param fraction: percentile between 0 and 1, ie: 0.95
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = int(round(fraction * (len(ordered) - 1)))
+    return ordered[rank]
+
+
+class MetricsCollector(object):
+    """Aggregate the timings of the requests by resource.
+
+        collector = MetricsCollector()
+        collector.install(prestashop)
+        ...
+        collector.summary()
+        {'products': {'requests': 120, 'errors': 0, 'cached': 0,
+                      'bytes': 4521452,
+                      'network_time': {'p50': 0.081, 'p95': 0.213},
+                      'parse_time': {'p50': 0.004, 'p95': 0.011},
+                      'convert_time': {'p50': 0.006, 'p95': 0.015}}}
+    """
+
+    TIMINGS = ('network_time', 'parse_time', 'convert_time')
+
+    def __init__(self, max_samples=10000):
+        """
+        :param max_samples: number of samples kept per resource and timing,
+            the oldest ones are dropped
+        """
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = defaultdict(lambda: defaultdict(int))
+            self._samples = defaultdict(
+                lambda: dict((timing, deque(maxlen=self.max_samples))
+                             for timing in self.TIMINGS))
+
+    def install(self, client):
+        """Register the hooks of the collector on a client."""
+        client.add_hook('after_response', self.after_response)
+        client.add_hook('after_parse', self.after_parse)
+        client.add_hook('on_error', self.on_error)
+
+    def after_response(self, event):
+        with self._lock:
+            counters = self._counters[event.resource]
+            counters['requests'] += 1
+            if event.cached:
+                counters['cached'] += 1
+            else:
+                self._samples[event.resource]['network_time'].append(
+                    event.network_time)
+            counters['bytes'] += event.bytes or 0
+
+    def after_parse(self, event):
+        with self._lock:
+            samples = self._samples[event.resource]
+            if event.parse_time is not None:
+                samples['parse_time'].append(event.parse_time)
+            if event.convert_time is not None:
+                samples['convert_time'].append(event.convert_time)
+
+    def on_error(self, event):
+        with self._lock:
+            self._counters[event.resource]['errors'] += 1
+
+    def summary(self):
+        """Counters and p50 / p95 of the timings by resource."""
+        result = {}
+        with self._lock:
+            resources = set(self._counters) | set(self._samples)
+            for resource in resources:
+                counters = self._counters[resource]
+                stats = {
+                    'requests': counters['requests'],
+                    'errors': counters['errors'],
+                    'cached': counters['cached'],
+                    'bytes': counters['bytes'],
+                }
+                for timing in self.TIMINGS:
+                    samples = list(self._samples[resource][timing])
+                    stats[timing] = {
+                        'p50': percentile(samples, 0.5),
+                        'p95': percentile(samples, 0.95),
+                    }
+                result[resource] = stats
+        return result
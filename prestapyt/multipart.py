@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streamed multipart/form-data bodies, to upload files with a constant memory.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import io
+import os
+import uuid
+
+CRLF = b'\r\n'
+
+
+def new_boundary():
+    """Random boundary, different for each request."""
+    return '----------prestapyt%s' % (uuid.uuid4().hex,)
+
+
+class _FileSource(object):
+    """Content of a part read from a file-like object or a path."""
+
+    def __init__(self, fileobj=None, path=None):
+        self.fileobj = fileobj
+        self.path = path
+        self.start = fileobj.tell() if fileobj is not None else 0
+        self._opened = None
+
+    def __len__(self):
+        if self.path is not None:
+            return os.path.getsize(self.path)
+        try:
+            size = os.fstat(self.fileobj.fileno()).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            position = self.fileobj.tell()
+            size = self.fileobj.seek(0, os.SEEK_END)
+            self.fileobj.seek(position)
+        return size - self.start
+
+    def open(self):
+        if self.path is not None:
+            self._opened = io.open(self.path, 'rb')
+            return self._opened
+        self.fileobj.seek(self.start)
+        return self.fileobj
+
+    def close(self):
+        if self._opened is not None:
+            self._opened.close()
+            self._opened = None
+
+
+class MultipartBody(object):
+    """File-like multipart/form-data body, read by chunks.
+
+    Its length is known beforehand so the request is sent with a
+    Content-Length. The files are opened and read only when the body
+    is read.
+    """
+
+    def __init__(self, parts, boundary=None):
+        """
+        :param parts: sequence of (name, filename, content type, value),
+            value being bytes, a string, a binary file-like object or
+            a path (os.PathLike)
+        :param boundary: boundary of the parts, random by default
+        """
+        self.boundary = boundary or new_boundary()
+        delimiter = ('--%s' % (self.boundary,)).encode('utf-8')
+        segments = []
+        for name, filename, content_type, value in parts:
+            head = CRLF.join([
+                delimiter,
+                ('Content-Disposition: form-data; name="%s"; filename="%s"'
+                 % (name, filename)).encode('utf-8'),
+                ('Content-Type: %s' % (content_type,)).encode('utf-8'),
+                b'',
+                b'',
+            ])
+            segments.append(head)
+            segments.append(self._source(value))
+            segments.append(CRLF)
+        segments.append(delimiter + b'--' + CRLF)
+        self._segments = segments
+        self._length = sum(len(segment) for segment in segments)
+        self.seek(0)
+
+    @staticmethod
+    def _source(value):
+        if isinstance(value, bytes):
+            return value
+        if hasattr(value, 'read'):
+            return _FileSource(fileobj=value)
+        if hasattr(value, '__fspath__'):
+            return _FileSource(path=os.fspath(value))
+        return value.encode('utf-8')
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary=%s' % (self.boundary,)
+
+    def __len__(self):
+        return self._length
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Only rewinding the body is supported."""
+        if offset != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation('can only rewind the body')
+        self.close()
+        self._index = 0
+        self._current = None
+        self._position = 0
+        return 0
+
+    def read(self, size=-1):
+        """Read up to size bytes, all the remaining ones if size < 0."""
+        chunks = []
+        remaining = size
+        while remaining != 0 and self._index < len(self._segments):
+            segment = self._segments[self._index]
+            if isinstance(segment, bytes):
+                if self._current is None:
+                    self._current = 0
+                end = (len(segment) if remaining < 0
+                       else min(len(segment), self._current + remaining))
+                data = segment[self._current:end]
+                self._current = end
+                finished = end == len(segment)
+            else:
+                if self._current is None:
+                    self._current = segment.open()
+                data = self._current.read(remaining if remaining > 0 else -1)
+                finished = not data or remaining < 0
+                if finished:
+                    segment.close()
+            if data:
+                chunks.append(data)
+                self._position += len(data)
+                if remaining > 0:
+                    remaining -= len(data)
+            if finished:
+                self._index += 1
+                self._current = None
+        return b''.join(chunks)
+
+    def close(self):
+        for segment in getattr(self, '_segments', ()):
+            if not isinstance(segment, bytes):
+                segment.close()
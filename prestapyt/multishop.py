@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run the same request on several shops concurrently.
+
+    shops = MultiShopClient([
+        ShopTarget('fr', 'https://shop.example.com/api', KEY, id_shop=1),
+        ShopTarget('de', 'https://shop.example.com/api', KEY, id_shop=2),
+        ShopTarget('outlet', 'https://outlet.example.com/api', OUTLET_KEY),
+    ])
+    results = shops.get('stock_availables', options={'display': 'full'})
+    for shop, stock in shops.merge(results):
+        print(shop, stock['id_product'], stock['quantity'])
+
+The shops of a multistore (same url and key, one `id_shop` per target)
+share a client, the `id_shop` option is added to their requests.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import threading
+
+from collections import OrderedDict
+from collections import namedtuple
+
+import requests
+
+from . import batch
+from .prestapyt import PrestaShopWebServiceDict
+from .prestapyt import PrestaShopWebServiceError
+from .prestapyt import _listing_elements
+
+ShopTarget = namedtuple('ShopTarget', ['name', 'api_url', 'api_key',
+                                       'id_shop'])
+ShopTarget.__new__.__defaults__ = (None,)
+ShopTarget.__doc__ = """A shop requested by a MultiShopClient.
+
+:param name: name of the shop, the results are tagged with the target
+:param api_url: url of the webservice
+:param api_key: key of the webservice
+:param id_shop: optional id of the shop in a multistore
+"""
+
+
+class MultiShopClient(object):
+    """Fan out the requests over several shops."""
+
+    def __init__(self, targets, client_class=PrestaShopWebServiceDict,
+                 max_per_target=4, **client_kwargs):
+        """
+        :param targets: iterable of ShopTarget (or tuples of its fields)
+        :param client_class: class of the clients,
+            PrestaShopWebServiceDict by default
+        :param max_per_target: number of concurrent requests per target
+        :param client_kwargs: other arguments of the clients,
+            ie: cache, retry, rate_limiter
+        """
+        self.targets = [target if isinstance(target, ShopTarget)
+                        else ShopTarget(*target) for target in targets]
+        names = [target.name for target in self.targets]
+        if len(set(names)) != len(names):
+            raise PrestaShopWebServiceError('The target names must be unique')
+        self.max_per_target = max_per_target
+        self.clients = {}
+        self._semaphores = {}
+        # a client (and its connection pool) by webservice
+        shared = OrderedDict()
+        for target in self.targets:
+            key = (target.api_url, target.api_key)
+            if key not in shared:
+                shared[key] = client_class(target.api_url, target.api_key,
+                                           **client_kwargs)
+            self.clients[target.name] = shared[key]
+            self._semaphores[target.name] = threading.BoundedSemaphore(
+                max_per_target)
+        for key, client in shared.items():
+            count = sum(1 for target in self.targets
+                        if (target.api_url, target.api_key) == key)
+            client._ensure_pool_size(count * max_per_target)
+
+    def client(self, name):
+        """Client of a target."""
+        return self.clients[name]
+
+    def _select(self, targets):
+        if targets is None:
+            return self.targets
+        by_name = dict((target.name, target) for target in self.targets)
+        return [by_name[name] for name in targets]
+
+    @staticmethod
+    def target_options(target, options):
+        """Options of a request for a target, with its id_shop."""
+        options = dict(options or {})
+        if target.id_shop is not None:
+            options.setdefault('id_shop', target.id_shop)
+        return options
+
+    def fan_out(self, func, targets=None):
+        """Call func for each target concurrently.
+
+        :param func: callable (client, target) returning the result
+            of the target
+        :param targets: optional names of the targets, all by default
+        :return: list of BatchResult(target, result, error) in the order
+            of the targets, error being a PrestaShopWebServiceError or
+            a requests exception
+        """
+        selected = self._select(targets)
+        if not selected:
+            return []
+
+        def call(target):
+            with self._semaphores[target.name]:
+                return func(self.clients[target.name], target)
+
+        return list(batch.iter_concurrently(
+            call, selected,
+            max_workers=len(selected),
+            errors=(PrestaShopWebServiceError,
+                    requests.exceptions.RequestException),
+        ))
+
+    def search(self, resource, options=None, targets=None):
+        """Search the ids of a resource on each target.
+
+        :param resource: type of resource to search
+        :param options: optional dict of parameters, see `search`
+        :param targets: optional names of the targets, all by default
+        :return: list of BatchResult(target, ids, error)
+        """
+        return self.fan_out(
+            lambda client, target: client.search(
+                resource, options=self.target_options(target, options)),
+            targets=targets)
+
+    def get(self, resource, resource_id=None, options=None, targets=None):
+        """Retrieve (GET) a resource on each target.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional id of the resource
+        :param options: optional dict of parameters, see `get`
+        :param targets: optional names of the targets, all by default
+        :return: list of BatchResult(target, response, error)
+        """
+        return self.fan_out(
+            lambda client, target: client.get(
+                resource, resource_id,
+                options=self.target_options(target, options)),
+            targets=targets)
+
+    @staticmethod
+    def merge(results, listing=True):
+        """Items of the successful results, tagged by target name.
+
+        :param results: list of BatchResult as returned by `search`/`get`
+        :param listing: whether the results are listings of the dict
+            client (their records are given one by one) or single
+            records (given as is)
+        :return: generator of (target name, item)
+        """
+        for result in results:
+            if result.error is not None:
+                continue
+            items = result.result
+            if not listing:
+                items = [items]
+            elif isinstance(items, dict):
+                items = _listing_elements(items)
+            for item in items:
+                yield result.key.name, item
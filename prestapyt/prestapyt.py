@@ -27,17 +27,47 @@ if PY2:
     from future.standard_library import install_aliases
     install_aliases()
 
+from urllib.parse import parse_qs
 from urllib.parse import urlencode
-
+from urllib.parse import urlparse
+
+import copy
+import os
+import pathlib
+import re
+import threading
+import time
 import warnings
+
+from timeit import default_timer as timer
 import requests
 import mimetypes
 
+from collections import OrderedDict
+from decimal import Decimal
+from decimal import InvalidOperation
+
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from . import batch
+from . import cache
+from . import coercion
+from . import compact
+from . import metrics
+from . import multipart
+from . import raw
 from . import xml2dict
 from . import dict2xml
 
 from xml.parsers.expat import ExpatError
 
+# past.builtins generates deprecated warning (import imp)
+try:
+    from __builtin__ import basestring
+except ImportError:
+    from past.types import basestring
+
 try:
     from packaging.version import Version
 except ImportError as e:
@@ -62,6 +92,35 @@ from .version import __author__
 from .version import __version__
 
 
+class _HTTPDebug(object):
+    """Switch the debug level of http.client for the verbose clients.
+
+    The level is global: it is enabled while at least one request of a
+    verbose client is running and restored after the last one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._level = 0
+
+    def enable(self):
+        with self._lock:
+            if not self._count:
+                self._level = HTTPConnection.debuglevel
+                HTTPConnection.debuglevel = 1
+            self._count += 1
+
+    def disable(self):
+        with self._lock:
+            self._count -= 1
+            if not self._count:
+                HTTPConnection.debuglevel = self._level
+
+
+_http_debug = _HTTPDebug()
+
+
 class PrestaShopWebServiceError(Exception):
     """Generic PrestaShop WebServices error class.
 
@@ -86,8 +145,13 @@ class PrestaShopAuthenticationError(PrestaShopWebServiceError): # noqa
     pass # noqa
 
 
-class PrestaShopWebService(object):
-    """Interact with the PrestaShop WebService API, use XML for messages."""
+class _PrestaShopWebServiceBase(object):
+    """Parts of the clients which do not depend on how requests are sent.
+
+    Url building, options validation, checks of the status code and
+    version of the responses and parsing, shared by the synchronous
+    clients and the asyncio clients.
+    """
 
     MIN_COMPATIBLE_VERSION = '1.4.0.17'
     # 4th version number is to avoid constant version changes
@@ -96,34 +160,11 @@ class PrestaShopWebService(object):
     def __init__(self, api_url, api_key, debug=False, session=None,
                  verbose=False):
         """
-        Create an instance of PrestashopWebService.
-
-        In your code, you can use :
-        from prestapyt import PrestaShopWebService, PrestaShopWebServiceError
-
-        try:
-            prestashop = PrestaShopWebService(
-                'http://localhost:8080/api',
-                'BVWPFFYBT97WKM959D7AVVD0M4815Y1L'
-            )
-        except PrestaShopWebServiceError as err:
-            ...
-
-        When verbose mode is activated, you might need to activate the
-        debug logging for the logger "requests.packages.urllib3"::
-
-          logger = logging.getLogger("requests.packages.urllib3")
-          logger.setLevel(logging.DEBUG)
-
-        The verbose logging will show the requests, including headers and data,
-        and the responses with headers but no data.
-
         :param api_url: Root URL for the shop
         :param api_key: Authentification key
         :param debug: activate PrestaShop's webservice debug mode
         :param session: pass a custom requests Session
-        :param verbose: activate logging of the requests/responses (but no
-        responses body)
+        :param verbose: activate logging of the requests/responses
         """
         # required to hit prestashop
         self._api_url = api_url
@@ -230,40 +271,21 @@ class PrestaShopWebService(object):
                     "Please upgrade/downgrade this library") % (version,))
         return True
 
-    def _execute(self, url, method, data=None, add_headers=None):
-        """Execute a request on the PrestaShop Webservice.
-
-        :param url: full url to call
-        :param method: GET, POST, PUT, DELETE, HEAD
-        :param data: for PUT (edit) and POST (add) only,
-                     the xml sent to PrestaShop
-        :param add_headers: additional headers merged onto instance's headers.
-        :return: tuple with (status code, header, content) of the response.
-        """
-        if add_headers is None:
-            add_headers = {}
-
-        request_headers = self.client.headers.copy()
-        request_headers.update(add_headers)
+    def _current_event(self):
+        """RequestEvent of the last request, None when not instrumented."""
+        return None
 
-        if self.verbose:
-            currentlevel = HTTPConnection.debuglevel
-            HTTPConnection.debuglevel = 1
-        try:
-            response = self.client.request(
-                method,
-                url,
-                data=data,
-                headers=request_headers,
-            )
-        finally:
-            if self.verbose:
-                HTTPConnection.debuglevel = currentlevel
-
-        self._check_status_code(response.status_code, response.content)
-        self._check_version(response.headers.get('psws-version'))
+    def _url_resource(self, url):
+        """Return the resource of an url, ie: 'addresses'.
 
-        return response
+        :param url: full url of a request
+        :return: the resource as string
+        """
+        if url.startswith(self._api_url):
+            path = url[len(self._api_url):]
+        else:
+            path = urlparse(url).path.split('/api/', 1)[-1]
+        return re.split(r'[/?]', path, 1)[0]
 
     def _parse(self, content):
         """Parse the response of the webservice.
@@ -274,6 +296,7 @@ class PrestaShopWebService(object):
         if not content:
             raise PrestaShopWebServiceError('HTTP response is empty')
 
+        start = timer()
         try:
             parsed_content = ElementTree.fromstring(content)
         except ExpatError as err:
@@ -285,6 +308,9 @@ class PrestaShopWebService(object):
                 'HTTP XML response is not parsable : %s. %s' %
                 (e, content[:512])
             )
+        event = self._current_event()
+        if event is not None:
+            event.parse_time = timer() - start
 
         return parsed_content
 
@@ -337,6 +363,328 @@ class PrestaShopWebService(object):
             options.update({'debug': True})
         return urlencode(options)
 
+    def _build_url(self, resource, resource_id=None, options=None):
+        """Build the full url of a resource.
+
+        :param resource: type of resource
+        :param resource_id: optional resource id
+        :param options: optional dict of parameters, validated
+            and added as querystring
+        :return: full url
+        """
+        full_url = self._api_url + resource
+        if resource_id is not None:
+            full_url += "/%s" % (resource_id,)
+        if options is not None:
+            self._validate_query_options(options)
+            full_url += "?%s" % (self._options_to_querystring(options),)
+        return full_url
+
+    def _delete_url(self, resource, resource_ids):
+        """Build the url to delete one or many resources.
+
+        :param resource: type of resource to delete
+        :param resource_ids: int or list of ids to delete
+        :return: full url
+        """
+        full_url = self._api_url + resource
+        if isinstance(resource_ids, (tuple, list)):
+            full_url += "/?id=[%s]" % (','.join([str(resource_id)
+                                       for resource_id in resource_ids]),)
+        else:
+            full_url += "/%s" % str(resource_ids)
+        return full_url
+
+    def encode_multipart_formdata(self, files):
+        """Encode files to an http multipart/form-data.
+
+        :param files: a sequence of (type, filename, value)
+            elements for data to be uploaded as files,
+            see `encode_multipart_stream`.
+        :return: headers and body as bytes.
+        """
+        headers, body = self.encode_multipart_stream(files)
+        try:
+            return headers, body.read()
+        finally:
+            body.close()
+
+    def encode_multipart_stream(self, files):
+        """Encode files to a streamed http multipart/form-data.
+
+        The files are read by chunks when the body is sent, the
+        Content-Length is computed beforehand.
+
+        :param files: a sequence of elements for data to be uploaded as
+            files, either (type, filename, value), value being bytes,
+            a string, a binary file-like object or a pathlib.Path,
+            or (type, path) to upload a file from its path.
+        :return: headers and body as a file-like MultipartBody.
+        """
+        parts = []
+        for item in files:
+            if len(item) == 2:
+                key, path = item
+                filename = os.path.basename(os.fspath(path))
+                value = pathlib.Path(path)
+            else:
+                key, filename, value = item
+            parts.append((key, filename, self.get_content_type(filename),
+                          value))
+        body = multipart.MultipartBody(parts)
+        headers = {'Content-Type': body.content_type}
+        return headers, body
+
+    def get_content_type(self, filename):
+        """Retrieve filename mimetype.
+
+        :param filename: file name.
+        :return: mimetype.
+        """
+        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+class PrestaShopWebService(_PrestaShopWebServiceBase):
+    """Interact with the PrestaShop WebService API, use XML for messages."""
+
+    def __init__(self, api_url, api_key, debug=False, session=None,
+                 verbose=False, cache=None, retry=None, rate_limiter=None,
+                 single_flight=False):
+        """
+        Create an instance of PrestashopWebService.
+
+        In your code, you can use :
+        from prestapyt import PrestaShopWebService, PrestaShopWebServiceError
+
+        try:
+            prestashop = PrestaShopWebService(
+                'http://localhost:8080/api',
+                'BVWPFFYBT97WKM959D7AVVD0M4815Y1L'
+            )
+        except PrestaShopWebServiceError as err:
+            ...
+
+        When verbose mode is activated, you might need to activate the
+        debug logging for the logger "requests.packages.urllib3"::
+
+          logger = logging.getLogger("requests.packages.urllib3")
+          logger.setLevel(logging.DEBUG)
+
+        The verbose logging will show the requests, including headers and data,
+        and the responses with headers but no data.
+
+        :param api_url: Root URL for the shop
+        :param api_key: Authentification key
+        :param debug: activate PrestaShop's webservice debug mode
+        :param session: pass a custom requests Session
+        :param verbose: activate logging of the requests/responses (but no
+        responses body)
+        :param cache: optional ResponseCache keeping the responses of the
+            GET requests, invalidated when a resource is written
+        :param retry: optional RetryPolicy retrying the requests failing
+            with a connection error or a transient status code
+        :param rate_limiter: optional RateLimiter, can be shared by
+            several clients
+        :param single_flight: coalesce the identical GET requests made
+            concurrently by several threads into one request, each
+            thread gets its own copy of the result
+        """
+        super(PrestaShopWebService, self).__init__(
+            api_url, api_key, debug=debug, session=session,
+            verbose=verbose)
+        self.cache = cache
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.single_flight = batch.SingleFlight() if single_flight else None
+        self.hooks = dict((hook, []) for hook in metrics.HOOKS)
+        self._local = threading.local()
+
+    def _execute(self, url, method, data=None, add_headers=None,
+                 stream=False, use_cache=True):
+        """Execute a request on the PrestaShop Webservice.
+
+        :param url: full url to call
+        :param method: GET, POST, PUT, DELETE, HEAD
+        :param data: for PUT (edit) and POST (add) only,
+                     the xml sent to PrestaShop
+        :param add_headers: additional headers merged onto instance's headers.
+        :param stream: do not download the body of a successful response
+            immediately, it has to be consumed with `iter_content`
+        :param use_cache: read and keep the response of a GET in the
+            response cache, False to always request the shop
+        :return: tuple with (status code, header, content) of the response.
+        """
+        if add_headers is None:
+            add_headers = {}
+
+        request_headers = self.client.headers.copy()
+        request_headers.update(add_headers)
+
+        event = metrics.RequestEvent(method, url, self._url_resource(url))
+        self._local.event = event
+        self._fire('before_request', event)
+        try:
+            return self._execute_event(event, data, request_headers, stream,
+                                       use_cache)
+        except Exception as err:
+            event.error = err
+            self._fire('on_error', event)
+            raise
+
+    def _execute_event(self, event, data, request_headers, stream,
+                       use_cache=True):
+        """Execute the request of an event, see `_execute`."""
+        url = event.url
+        method = event.method
+        cache_entry = None
+        use_cache = (use_cache and self.cache is not None and
+                     method == 'GET' and not stream)
+        if use_cache:
+            cache_entry = self.cache.lookup(url)
+            if cache_entry is not None:
+                if cache_entry.is_fresh():
+                    return self._cached_response(event, cache_entry)
+                request_headers.update(cache_entry.validators())
+
+        start = timer()
+        response = self._send(url, method, data, request_headers, stream)
+
+        if cache_entry is not None and response.status_code == 304:
+            self.cache.revalidated(url, cache_entry)
+            event.network_time = timer() - start
+            return self._cached_response(event, cache_entry)
+
+        if stream and response.status_code in (200, 201):
+            # keep the body on the wire, it is read by the caller
+            content = None
+        else:
+            content = response.content
+        event.network_time = timer() - start
+        event.status_code = response.status_code
+        if content is not None:
+            event.bytes = len(content)
+        self._fire('after_response', event)
+
+        self._check_status_code(response.status_code, content)
+        self._check_version(response.headers.get('psws-version'))
+
+        if use_cache:
+            self.cache.store(url, self._url_resource(url), response)
+        elif self.cache is not None and method in ('POST', 'PUT', 'DELETE'):
+            self.cache.invalidate(self._url_resource(url))
+
+        return response
+
+    def _cached_response(self, event, cache_entry):
+        """Return the response of the cache for an event."""
+        response = cache_entry.response
+        event.cached = True
+        event.status_code = response.status_code
+        event.bytes = len(response.content)
+        if event.network_time is None:
+            event.network_time = 0.0
+        self._fire('after_response', event)
+        return response
+
+    def add_hook(self, hook, callback):
+        """Register a callback called with a RequestEvent on a hook.
+
+        :param hook: one of 'before_request', 'after_response',
+            'after_parse', 'on_error'
+        :param callback: callable taking a RequestEvent
+        """
+        if hook not in self.hooks:
+            raise PrestaShopWebServiceError('Unknown hook: %s' % (hook,))
+        self.hooks[hook].append(callback)
+
+    def remove_hook(self, hook, callback):
+        """Unregister a callback of a hook."""
+        self.hooks[hook].remove(callback)
+
+    def _fire(self, hook, event):
+        for callback in self.hooks[hook]:
+            callback(event)
+
+    def _current_event(self):
+        """RequestEvent of the last request executed by the thread."""
+        return getattr(self._local, 'event', None)
+
+    def _parse_response(self, response, parse=None):
+        """Parse the content of a response and fire the after_parse hook.
+
+        :param response: response returned by `_execute`
+        :param parse: optional function parsing the content, `_parse`
+            by default
+        :return: the parsed content
+        """
+        if parse is None:
+            parse = self._parse
+        event = self._current_event()
+        if event is None:
+            return parse(response.content)
+        event.parse_time = None
+        start = timer()
+        try:
+            parsed_content = parse(response.content)
+        except Exception as err:
+            event.error = err
+            self._fire('on_error', event)
+            raise
+        elapsed = timer() - start
+        if event.parse_time is not None:
+            # the remaining time is the conversion of the ElementTree
+            event.convert_time = max(0.0, elapsed - event.parse_time)
+        else:
+            event.parse_time = elapsed
+        self._fire('after_parse', event)
+        return parsed_content
+
+    def _send(self, url, method, data, headers, stream=False):
+        """Send a request, applying the rate limiter and the retry policy.
+
+        :param url: full url to call
+        :param method: GET, POST, PUT, DELETE, HEAD
+        :param data: body of the request
+        :param headers: headers of the request
+        :param stream: do not download the body of the response
+        :return: the response of the last attempt
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.verbose:
+                _http_debug.enable()
+            try:
+                response = self.client.request(
+                    method,
+                    url,
+                    data=data,
+                    headers=headers,
+                    stream=stream,
+                )
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                if (self.retry is None or
+                        not self.retry.can_retry(method, attempt)):
+                    raise
+                delay = self.retry.backoff(attempt + 1)
+            else:
+                if (self.retry is None or
+                        not self.retry.is_retryable_status(
+                            response.status_code) or
+                        not self.retry.can_retry(method, attempt)):
+                    return response
+                delay = self.retry.backoff(attempt + 1, response)
+                response.close()
+            finally:
+                if self.verbose:
+                    _http_debug.disable()
+            attempt += 1
+            if hasattr(data, 'seek'):
+                data.seek(0)
+            time.sleep(delay)
+
     def add(self, resource, content=None, files=None, options=None):
         """Add (POST) a resource. Content can be a dict of values to create.
 
@@ -346,13 +694,10 @@ class PrestaShopWebService(object):
             with the necessary root tag ie:
             <prestashop>[[dict converted to xml]]</prestashop>
         :param files: a sequence of (type, filename, value) elements
-            for data to be uploaded as files.
+            for data to be uploaded as files, see `encode_multipart_stream`.
         :return: an ElementTree of the response from the web service
         """
-        full_url = self._api_url + resource
-        if options is not None:
-            self._validate_query_options(options)
-            full_url += "?%s" % (self._options_to_querystring(options),)
+        full_url = self._build_url(resource, options=options)
         return self.add_with_url(full_url, content, files)
 
     def add_with_url(self, url, xml=None, files=None):
@@ -361,20 +706,24 @@ class PrestaShopWebService(object):
         :param url: A full URL which for the resource type to create
         :param xml: Full XML as string of new resource.
         :param files: a sequence of (type, filename, value)
-            elements for data to be uploaded as files.
+            elements for data to be uploaded as files,
+            the files are streamed, see `encode_multipart_stream`.
         :return: an ElementTree of the response from the web service
         """
         if files is not None:
-            headers, data = self.encode_multipart_formdata(files)
-            response = self._execute(url, 'POST', data=data,
-                                     add_headers=headers)
+            headers, data = self.encode_multipart_stream(files)
+            try:
+                response = self._execute(url, 'POST', data=data,
+                                         add_headers=headers)
+            finally:
+                data.close()
         elif xml is not None:
             headers = {'Content-Type': 'text/xml'}
             response = self._execute(url, 'POST', data=xml,
                                      add_headers=headers)
         else:
             raise PrestaShopWebServiceError('Undefined data.')
-        return self._parse(response.content)
+        return self._parse_response(response)
 
     def search(self, resource, options=None):
         """Retrieve (GET) a resource and return the xml with the ids.
@@ -404,12 +753,7 @@ class PrestaShopWebService(object):
                         'filter', 'display', 'sort', 'limit', 'schema')
         :return: an ElementTree of the response
         """
-        full_url = self._api_url + resource
-        if resource_id is not None:
-            full_url += "/%s" % (resource_id,)
-        if options is not None:
-            self._validate_query_options(options)
-            full_url += "?%s" % (self._options_to_querystring(options),)
+        full_url = self._build_url(resource, resource_id, options)
         return self.get_with_url(full_url)
 
     def get_with_url(self, url):
@@ -418,7 +762,146 @@ class PrestaShopWebService(object):
         :param url: URL which explicitly set resource type and ID to retrieve
         :return: an ElementTree of the resource
         """
-        return self._parse(self._execute(url, 'GET').content)
+        if self.single_flight is not None:
+            return self.single_flight.do(
+                url,
+                lambda: self._parse_response(self._execute(url, 'GET')),
+                copy=copy.deepcopy)
+        return self._parse_response(self._execute(url, 'GET'))
+
+    def get_raw(self, resource, resource_id=None, options=None):
+        """Retrieve (GET) a resource without parsing the response.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional resource id to retrieve
+        :param options: Optional dict of parameters (one or more of
+                        'filter', 'display', 'sort', 'limit', 'schema')
+        :return: RawResponse with the body as bytes and the headers
+        """
+        full_url = self._build_url(resource, resource_id, options)
+        return self.get_raw_with_url(full_url)
+
+    def get_raw_with_url(self, url):
+        """Retrieve (GET) a resource from a full URL without parsing it.
+
+        :param url: URL which explicitly set resource type and ID to retrieve
+        :return: RawResponse with the body as bytes and the headers
+        """
+        response = self._execute(url, 'GET')
+        return raw.RawResponse(url, response.status_code, response.headers,
+                               response.content)
+
+    def get_lazy(self, resource, resource_id=None, options=None):
+        """Retrieve (GET) a resource, parsed only when its content is used.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional resource id to retrieve
+        :param options: Optional dict of parameters (one or more of
+                        'filter', 'display', 'sort', 'limit', 'schema')
+        :return: LazyResponse, parsed as `get` does on the first access
+        """
+        full_url = self._build_url(resource, resource_id, options)
+        return self.get_lazy_with_url(full_url)
+
+    def get_lazy_with_url(self, url):
+        """Retrieve (GET) a resource from a full URL, parsed on demand.
+
+        :param url: URL which explicitly set resource type and ID to retrieve
+        :return: LazyResponse, parsed as `get_with_url` does on the
+            first access
+        """
+        response = self._execute(url, 'GET')
+        event = self._current_event()
+        return raw.LazyResponse(
+            raw.RawResponse(url, response.status_code, response.headers,
+                            response.content),
+            lambda: self._parse_later(response, event))
+
+    def _parse_later(self, response, event):
+        """Parse a response after the request, timed in its event."""
+        previous = self._current_event()
+        self._local.event = event
+        try:
+            return self._parse_response(response)
+        finally:
+            self._local.event = previous
+
+    def get_compact(self, resource, resource_id=None, options=None):
+        """Retrieve (GET) a resource as compact records.
+
+        The records are built from the ElementTree of the response,
+        see the compact module.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional resource id to retrieve
+        :param options: Optional dict of parameters (one or more of
+                        'filter', 'display', 'sort', 'limit')
+        :return: a CompactRecord when resource_id is given,
+            else the list of CompactRecord of the listing
+        """
+        full_url = self._build_url(resource, resource_id, options)
+        response = self._execute(full_url, 'GET')
+
+        def parse(content):
+            # the ElementTree is needed, even for the dict client
+            tree = PrestaShopWebService._parse(self, content)
+            return compact.from_tree(tree, listing=resource_id is None)
+        return self._parse_response(response, parse=parse)
+
+    def get_many(self, resource, resource_ids, options=None, max_workers=8,
+                 ordered=True):
+        """Retrieve (GET) many resources concurrently.
+
+        The requests are run in a pool of threads sharing the session,
+        the connection pool of the session is enlarged if needed
+        (see `_ensure_pool_size`).
+        An error on one id does not stop the others.
+
+        :param resource: type of resource to retrieve
+        :param resource_ids: iterable of ids to retrieve
+        :param options: Optional dict of parameters used for each id
+        :param max_workers: number of concurrent requests
+        :param ordered: return the results in the order of resource_ids,
+            otherwise in the order they complete
+        :return: list of BatchResult(id, response, error),
+            error being a PrestaShopWebServiceError or a requests exception
+        """
+        def get(resource_id):
+            return self.get(resource, resource_id,
+                            options=dict(options) if options else None)
+
+        self._ensure_pool_size(max_workers)
+        results = batch.iter_concurrently(
+            get, resource_ids,
+            max_workers=max_workers,
+            ordered=ordered,
+            errors=(PrestaShopWebServiceError,
+                    requests.exceptions.RequestException),
+        )
+        return list(results)
+
+    def _ensure_pool_size(self, size):
+        """Make sure the session keeps enough connections to the shop.
+
+        When the adapter of the api url is a plain HTTPAdapter with a
+        connection pool smaller than `size`, an HTTPAdapter with the same
+        settings and a larger pool is mounted for the api url.
+        A custom adapter is left as is: it has to keep `size` connections
+        by itself (`pool_maxsize`), else the extra ones are discarded.
+
+        :param size: number of connections used concurrently
+        """
+        adapter = self.client.get_adapter(self._api_url)
+        if type(adapter) is not HTTPAdapter:
+            return
+        if adapter._pool_maxsize >= size:
+            return
+        self.client.mount(self._api_url, HTTPAdapter(
+            pool_connections=adapter._pool_connections,
+            pool_maxsize=size,
+            max_retries=adapter.max_retries,
+            pool_block=adapter._pool_block,
+        ))
 
     def head(self, resource, resource_id=None, options=None):
         """Head method (HEAD) a resource.
@@ -429,12 +912,7 @@ class PrestaShopWebService(object):
             (one or more of 'filter', 'display', 'sort', 'limit', 'schema')
         :return: the header of the response as a dict
         """
-        full_url = self._api_url + resource
-        if resource_id is not None:
-            full_url += "/%s" % (resource_id,)
-        if options is not None:
-            self._validate_query_options(options)
-            full_url += "?%s" % (self._options_to_querystring(options),)
+        full_url = self._build_url(resource, resource_id, options)
         return self.head_with_url(full_url)
 
     def head_with_url(self, url):
@@ -452,10 +930,7 @@ class PrestaShopWebService(object):
         :param content: modified XML as string of the resource.
         :return: an ElementTree of the Webservice's response
         """
-        full_url = "%s%s" % (self._api_url, resource)
-        if options:
-            self._validate_query_options(options)
-            full_url += "?%s" % (self._options_to_querystring(options),)
+        full_url = self._build_url(resource, options=options or None)
         return self.edit_with_url(full_url, content)
 
     def edit_with_url(self, url, content):
@@ -467,7 +942,7 @@ class PrestaShopWebService(object):
         """
         headers = {'Content-Type': 'text/xml'}
         response = self._execute(url, 'PUT', data=content, add_headers=headers)
-        return self._parse(response.content)
+        return self._parse_response(response)
 
     def delete(self, resource, resource_ids):
         """Delete (DELETE) a resource.
@@ -477,13 +952,37 @@ class PrestaShopWebService(object):
         :return: True if delete is done,
             raise an error PrestaShopWebServiceError if missed
         """
-        full_url = self._api_url + resource
-        if isinstance(resource_ids, (tuple, list)):
-            full_url += "/?id=[%s]" % (','.join([str(resource_id)
-                                       for resource_id in resource_ids]),)
-        else:
-            full_url += "/%s" % str(resource_ids)
-        return self.delete_with_url(full_url)
+        return self.delete_with_url(self._delete_url(resource, resource_ids))
+
+    def delete_many(self, resource, resource_ids, chunk_size=None,
+                    max_workers=4, max_url_length=2048):
+        """Delete (DELETE) many resources with concurrent requests.
+
+        The ids are split in chunks deleted with '?id=[1,2,3]' urls
+        staying under max_url_length characters.
+
+        :param resource: type of resource to delete
+        :param resource_ids: iterable of ids to delete
+        :param chunk_size: optional maximum number of ids per request
+        :param max_workers: number of concurrent requests
+        :param max_url_length: maximum length of the urls
+        :return: list of BatchResult(list of ids, True, error) by chunk,
+            error being a PrestaShopWebServiceError or a requests exception
+        """
+        budget = max_url_length - len(self._delete_url(resource, []))
+        chunks = _chunk_ids(resource_ids, budget, max_count=chunk_size)
+
+        def delete(chunk):
+            return self.delete(resource, chunk)
+
+        self._ensure_pool_size(max_workers)
+        results = batch.iter_concurrently(
+            delete, chunks,
+            max_workers=max_workers,
+            errors=(PrestaShopWebServiceError,
+                    requests.exceptions.RequestException),
+        )
+        return list(results)
 
     def delete_with_url(self, url):
         """Delete (DELETE) a resource.
@@ -495,45 +994,175 @@ class PrestaShopWebService(object):
         self._execute(url, 'DELETE')
         return True
 
-    def encode_multipart_formdata(self, files):
-        """Encode files to an http multipart/form-data.
 
-        :param files: a sequence of (type, filename, value)
-            elements for data to be uploaded as files.
-        :return: headers and body.
-        """
-        BOUNDARY = '----------ThIs_Is_tHe_bouNdaRY_$'
-        CRLF = b'\r\n'
-        L = []
-        for (key, filename, value) in files:
-            L.append('--' + BOUNDARY)
-            L.append(
-                'Content-Disposition: form-data; \
-                    name="%s"; filename="%s"' % (key, filename))
-            L.append('Content-Type: %s' % self.get_content_type(filename))
-            L.append('')
-            L.append(value)
-        L.append('--' + BOUNDARY + '--')
-        L.append('')
-        L = map(lambda l: l if isinstance(l, bytes) else l.encode('utf-8'), L)
-        body = CRLF.join(L)
-        headers = {
-            'Content-Type': 'multipart/form-data; boundary=%s' % BOUNDARY
-        }
-        return headers, body
+# end of an iterator, its items can be any value
+_END = object()
 
-    def get_content_type(self, filename):
-        """Retrieve filename mimetype.
 
-        :param filename: file name.
-        :return: mimetype.
-        """
-        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+def _listing_elements(response):
+    """Return the elements of a listing response as a list.
+
+    The returned response looks like :
+    for many resources :
+    {'addresses': {'address': [{'attrs': {'id': '1'}, 'value': ''},
+                               {'attrs': {'id': '2'}, 'value': ''},
+                               {'attrs': {'id': '3'}, 'value': ''}]}}
+    for one resource :
+    {'addresses': {'address': {'attrs': {'id': '1'}, 'value': ''}}}
+    for zero resource :
+    {'addresses': ''}
+
+    :param response: listing response as a dict, without the root
+        'prestashop' key
+    :return: list of the elements (dict) of the listing
+    """
+    elems = response
+    # not deterministic but we know that we only have one key
+    # in the response for the first 2 levels
+    for __ in range(2):
+        if not elems:
+            return []
+        elems = elems[list(elems.keys())[0]]
+    if not elems:
+        return []
+    # when there is only 1 resource, we do not have a list in the response
+    if not isinstance(elems, list):
+        elems = [elems]
+    return elems
+
+
+def _chunk_ids(resource_ids, budget, separator_length=1, max_count=None):
+    """Split ids in chunks which fit in an url.
+
+    :param resource_ids: iterable of ids
+    :param budget: maximum length of the ids of a chunk once joined
+    :param separator_length: length of the separator between 2 ids
+    :param max_count: optional maximum number of ids of a chunk
+    :return: generator of lists of ids, a chunk has at least one id
+    """
+    chunk = []
+    length = 0
+    for resource_id in resource_ids:
+        id_length = len(str(resource_id))
+        if chunk and (length + separator_length + id_length > budget or
+                      len(chunk) == max_count):
+            yield chunk
+            chunk = []
+            length = 0
+        if chunk:
+            length += separator_length
+        chunk.append(resource_id)
+        length += id_length
+    if chunk:
+        yield chunk
+
+
+def _record_id(record):
+    """Return the id of a record as int."""
+    record_id = record['id']
+    if isinstance(record_id, dict):
+        record_id = record_id['value']
+    return int(record_id)
+
+
+def _normalize_value(value):
+    """Return a value as it is written in the XML, to compare values."""
+    if isinstance(value, dict):
+        if list(value.keys()) == ['value']:
+            return _normalize_value(value['value'])
+        return dict((key, _normalize_value(item))
+                    for key, item in value.items())
+    if isinstance(value, list):
+        return [_normalize_value(item) for item in value]
+    if value is None:
+        return ''
+    if isinstance(value, dict2xml.SIMPLE_TYPES):
+        return dict2xml._format_value(value)
+    return value
+
+
+def _is_number(value):
+    return (isinstance(value, (int, float, Decimal)) and
+            not isinstance(value, bool))
+
+
+def _same_value(old, new):
+    """Compare the value of a record with a new value of a field.
+
+    A number given for a field is equal to the same number written
+    differently by PrestaShop, ie: 10 and '10.000000', or converted
+    by the typed mode, ie: 10 and Decimal('10.000000').
+    """
+    if ((_is_number(new) and (_is_number(old) or
+                              isinstance(old, basestring))) or
+            (_is_number(old) and isinstance(new, basestring))):
+        try:
+            return Decimal(str(old)) == Decimal(str(new))
+        except InvalidOperation:
+            return False
+    return _normalize_value(old) == _normalize_value(new)
+
+
+def _diff_fields(record, fields):
+    """Return the fields whose value differs from the record.
+
+    :param record: dict of the fields of a record
+    :param fields: dict of field: new value
+    :return: dict of the changed fields
+    """
+    return dict((key, value) for key, value in fields.items()
+                if key not in record or not _same_value(record[key], value))
+
+
+def _url_ids(url):
+    """Return the ids of the records of an url as int, ie:
+    'products/5' or 'products/?id=[1,2]'."""
+    parsed = urlparse(url)
+    ids = parse_qs(parsed.query).get('id')
+    if ids:
+        return [int(part) for part in ids[0].strip('[]').split(',')
+                if part.strip().isdigit()]
+    last = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+    return [int(last)] if last.isdigit() else []
+
+
+def _response_record_id(response):
+    """Return the id of the record of an add or edit response as int.
+
+    The response looks like {'prestashop': {'product': {'id': '1', ...}}}
+    """
+    content = response.get('prestashop', response)
+    record = content[list(content.keys())[0]]
+    return _record_id(record)
 
 
 class PrestaShopWebServiceDict(PrestaShopWebService):
     """Interacts with the PrestaShop WebService API, use dict for messages."""
 
+    def __init__(self, *args, **kwargs):
+        """
+        Same arguments as PrestaShopWebService, plus:
+
+        :param typed: convert the values of the fields to int, Decimal,
+            datetime, date or bool according to the formats declared
+            in the synopsis schema of their resource (fetched once per
+            resource), empty values are converted to None
+        :param record_cache: optional RecordCache used by `get` and
+            `get_many` for the records requested by id without options
+            other than 'id_shop'
+        """
+        typed = kwargs.pop('typed', False)
+        record_cache = kwargs.pop('record_cache', None)
+        super(PrestaShopWebServiceDict, self).__init__(*args, **kwargs)
+        self.typed = typed
+        self.record_cache = record_cache
+        # schema envelopes by (resource, schema)
+        self._schemas = {}
+        self._schemas_lock = threading.Lock()
+        # converters of the fields by tag of record, for the typed mode
+        self._converters = {}
+        self._typed_resources = set()
+
     def search(self, resource, options=None):
         """Retrieve (GET) a resource and return a list of its ids.
 
@@ -547,38 +1176,375 @@ class PrestaShopWebServiceDict(PrestaShopWebService):
             (one or more of 'filter', 'display', 'sort', 'limit', 'schema')
         :return: list of ids as int
         """
-        def dive(response, level=1):
-            # not deterministic but we know that we only have one key
-            # in the response for the first 2 levels like
-            # {'addresses': {'address': ...} this method has just
-            # purpose to dive of n level in the response
-            if not response:
-                return False
-            if level > 0:
-                return dive(response[list(response.keys())[0]], level=level - 1)
-            return response
-
-        # returned response looks like :
-        # for many resources :
-        # {'addresses': {'address': [{'attrs': {'id': '1'}, 'value': ''},
-        #                            {'attrs': {'id': '2'}, 'value': ''},
-        #                            {'attrs': {'id': '3'}, 'value': ''}]}}
-        # for one resource :
-        # {'addresses': {'address': {'attrs': {'id': '1'}, 'value': ''}}}
-        # for zero resource :
-        # {'addresses': ''}
         response = super(
             PrestaShopWebServiceDict, self).search(resource, options=options)
+        return [int(elem['attrs']['id'])
+                for elem in _listing_elements(response)]
 
-        elems = dive(response, level=2)
-        # when there is only 1 resource, we do not have a list in the response
-        if not elems:
-            return []
-        elif isinstance(elems, list):
-            ids = [int(elem['attrs']['id']) for elem in elems]
+    def iter_search(self, resource, options=None, page_size=1000,
+                    prefetch=False):
+        """Retrieve the ids of a resource page by page.
+
+        The listing is fetched with the 'limit' option ('offset,count')
+        so a large resource never comes back in a single response.
+
+        :param resource: string of the resource to search like,
+            ie: 'addresses', 'products', 'manufacturers', etc.
+        :param options: optional dict of parameters to filter the search
+            (one or more of 'filter', 'display', 'sort', 'schema'),
+            'limit' is driven by the pagination and can not be given
+        :param page_size: number of ids requested per page
+        :param prefetch: fetch the next page in a background thread
+            while the current one is consumed
+        :return: generator of ids as int
+        """
+        pages = self._iter_pages(resource, options, page_size, prefetch)
+        for elems in pages:
+            for elem in elems:
+                yield int(elem['attrs']['id'])
+
+    def iter_get(self, resource, options=None, page_size=100,
+                 prefetch=False):
+        """Retrieve (GET) the records of a resource page by page.
+
+        Same as `iter_search` but yields the records themselves.
+        When no 'display' option is given, 'full' is used.
+
+        :param resource: type of resource to retrieve
+        :param options: optional dict of parameters
+            (one or more of 'filter', 'display', 'sort', 'schema'),
+            'limit' is driven by the pagination and can not be given
+        :param page_size: number of records requested per page
+        :param prefetch: fetch the next page in a background thread
+            while the current one is consumed
+        :return: generator of records as dict
+        """
+        options = dict(options or {})
+        options.setdefault('display', 'full')
+        pages = self._iter_pages(resource, options, page_size, prefetch)
+        for elems in pages:
+            for elem in elems:
+                yield elem
+
+    def select(self, query, page_size=None, prefetch=False):
+        """Retrieve (GET) the projected records of a query.
+
+        The records are compact records (see `get_compact`) holding
+        only the fields of the 'display' option of the query, which
+        is mandatory.
+
+        :param query: prestapyt.query.Query of the listing
+        :param page_size: number of records requested per page,
+            all the records are requested at once when None
+        :param prefetch: fetch the next page in a background thread
+            while the current one is consumed
+        :return: generator of CompactRecord
+        """
+        if 'display' not in query:
+            raise PrestaShopWebServiceError(
+                'The query needs the fields to display'
+            )
+        if page_size is None:
+            pages = [self.get_compact(query.resource, options=query)]
         else:
-            ids = [int(elems['attrs']['id'])]
-        return ids
+            pages = self._iter_pages(
+                query.resource, query, page_size, prefetch,
+                fetch_page=lambda resource, options: self.get_compact(
+                    resource, options=options),
+            )
+        for records in pages:
+            for record in records:
+                yield record
+
+    def _iter_pages(self, resource, options, page_size, prefetch,
+                    fetch_page=None):
+        """Yield the elements of a listing, one list per page.
+
+        :param resource: type of resource to retrieve
+        :param options: dict of parameters of the listing
+        :param page_size: number of elements requested per page
+        :param prefetch: fetch the next page in a background thread
+        :param fetch_page: optional function (resource, options) returning
+            the list of elements of a page, read with `get` by default
+        :return: generator of lists of elements
+        """
+        options = dict(options or {})
+        if 'limit' in options:
+            raise PrestaShopWebServiceError(
+                "The 'limit' option can not be used with pagination"
+            )
+        if page_size < 1:
+            raise PrestaShopWebServiceError('page_size must be positive')
+
+        def fetch(offset):
+            page_options = dict(options,
+                                limit='%d,%d' % (offset, page_size))
+            if fetch_page is not None:
+                return fetch_page(resource, page_options)
+            response = self.get(resource, options=page_options)
+            return _listing_elements(response)
+
+        if not prefetch:
+            offset = 0
+            while True:
+                elems = fetch(offset)
+                if elems:
+                    yield elems
+                if len(elems) < page_size:
+                    return
+                offset += page_size
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            offset = 0
+            future = executor.submit(fetch, offset)
+            while future is not None:
+                elems = future.result()
+                offset += page_size
+                if len(elems) < page_size:
+                    future = None
+                else:
+                    future = executor.submit(fetch, offset)
+                if elems:
+                    yield elems
+        finally:
+            executor.shutdown(wait=True)
+
+    def get(self, resource, resource_id=None, options=None):
+        """Retrieve (GET) a resource.
+
+        A record requested by id without options (other than 'id_shop')
+        is read from the record cache when it is still valid, see
+        `RecordCache`.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: optional resource id to retrieve
+        :param options: Optional dict of parameters (one or more of
+                        'filter', 'display', 'sort', 'limit', 'schema')
+        :return: a dict of the response
+        """
+        _super = super(PrestaShopWebServiceDict, self)
+        scope = self._record_scope(options)
+        if scope is None or resource_id is None:
+            return _super.get(resource, resource_id, options=options)
+        try:
+            record_id = int(resource_id)
+        except (TypeError, ValueError):
+            return _super.get(resource, resource_id, options=options)
+        records, __ = self._cached_records(scope, resource, [record_id])
+        if record_id in records:
+            return records[record_id]
+        return self._fetch_record(scope, resource, resource_id, options)
+
+    def _fetch_record(self, scope, resource, resource_id, options):
+        """Retrieve (GET) a record missing from the record cache and keep it.
+
+        :param scope: RecordScope of the record
+        :param resource: type of resource to retrieve
+        :param resource_id: id of the record
+        :param options: options of the request, see `_record_scope`
+        :return: a dict of the response
+        """
+        _super = super(PrestaShopWebServiceDict, self)
+        response = _super.get(resource, resource_id, options=options)
+        record = list(response.values())[0] if response else None
+        try:
+            record_id = int(resource_id)
+        except (TypeError, ValueError):
+            return response
+        if isinstance(record, dict):
+            self.record_cache.store(scope, resource, record_id,
+                                    _normalize_value(record.get('date_upd')),
+                                    response)
+        return response
+
+    def get_many(self, resource, resource_ids, options=None, max_workers=8,
+                 ordered=True):
+        """Retrieve (GET) many resources concurrently.
+
+        Same as `PrestaShopWebService.get_many`, the records of the record
+        cache are validated at once with a few listings and only the
+        others are requested.
+        """
+        _super = super(PrestaShopWebServiceDict, self)
+        scope = self._record_scope(options)
+        if scope is None:
+            return _super.get_many(resource, resource_ids, options=options,
+                                   max_workers=max_workers, ordered=ordered)
+        resource_ids = list(resource_ids)
+        record_ids = []
+        for resource_id in resource_ids:
+            try:
+                record_ids.append(int(resource_id))
+            except (TypeError, ValueError):
+                record_ids.append(None)
+        cached, __ = self._cached_records(
+            scope, resource, [record_id for record_id in set(record_ids)
+                       if record_id is not None])
+
+        def fetch(resource_id):
+            # the record cache was already checked for these ids
+            return self._fetch_record(scope, resource, resource_id,
+                                      dict(options) if options else None)
+
+        self._ensure_pool_size(max_workers)
+        fetched = iter(list(batch.iter_concurrently(
+            fetch,
+            [resource_id for resource_id, record_id
+             in zip(resource_ids, record_ids) if record_id not in cached],
+            max_workers=max_workers,
+            ordered=ordered,
+            errors=(PrestaShopWebServiceError,
+                    requests.exceptions.RequestException),
+        )))
+        if not ordered:
+            return [batch.BatchResult(resource_id, cached[record_id], None)
+                    for resource_id, record_id in zip(resource_ids, record_ids)
+                    if record_id in cached] + list(fetched)
+        return [batch.BatchResult(resource_id, cached[record_id], None)
+                if record_id in cached else next(fetched)
+                for resource_id, record_id in zip(resource_ids, record_ids)]
+
+    def _record_scope(self, options):
+        """RecordScope of the records requested with options.
+
+        :param options: options of the request
+        :return: the RecordScope, None when the request does not use
+            the record cache
+        """
+        if self.record_cache is None:
+            return None
+        options = options or {}
+        if set(options) - set(['id_shop']):
+            return None
+        id_shop = options.get('id_shop')
+        return cache.RecordScope(self._api_url,
+                                 '' if id_shop is None else str(id_shop),
+                                 self.typed)
+
+    def _validate_records(self, scope, resource, record_ids):
+        """Check the records of the record cache against the shop.
+
+        The records used without validation are valid, the 'date_upd'
+        of the others is read with 'display=[id,date_upd]' listings.
+        The records changed or deleted in the shop are dropped from
+        the cache.
+
+        :return: tuple (list of the valid ids, list of the ids of the
+            records changed in the shop)
+        """
+        entries = self.record_cache.entries(scope, resource, record_ids)
+        valid = [record_id for record_id, (__, fresh) in entries.items()
+                 if fresh]
+        to_check = [record_id for record_id, (__, fresh) in entries.items()
+                    if not fresh]
+        if not to_check:
+            return valid, []
+        options = {'display': '[id,date_upd]'}
+        if scope.id_shop:
+            options['id_shop'] = scope.id_shop
+        try:
+            current, __ = self.get_batched(resource, to_check,
+                                           options=options)
+        except PrestaShopWebServiceError:
+            # no 'date_upd' for this resource, the records are read again
+            current = {}
+        confirmed = [record_id for record_id in to_check
+                     if record_id in current and
+                     _normalize_value(current[record_id].get('date_upd')) ==
+                     entries[record_id][0]]
+        self.record_cache.validated(scope, resource, confirmed)
+        confirmed_ids = set(confirmed)
+        dropped = [record_id for record_id in to_check
+                   if record_id not in confirmed_ids]
+        if dropped:
+            self.record_cache.invalidate(self._api_url, resource, dropped)
+        changed = [record_id for record_id in dropped
+                   if record_id in current]
+        return valid + confirmed, changed
+
+    def _cached_records(self, scope, resource, record_ids):
+        """Return the valid records of the record cache.
+
+        :return: tuple (dict of id: record, list of the ids of the
+            records changed in the shop)
+        """
+        valid, changed = self._validate_records(scope, resource, record_ids)
+        records = self.record_cache.load(scope, resource, valid)
+        self.record_cache.missed(len(set(record_ids)) - len(records))
+        return records, changed
+
+    def warm_up(self, resource, refresh=False, max_workers=8,
+                id_shop=None):
+        """Validate the records of a resource kept by the record cache.
+
+        Useful at the start of a program: the records cached by the
+        previous runs are validated with a few listings, then they are
+        used without request during the `max_age` of the cache.
+
+        :param resource: type of resource
+        :param refresh: read again the records changed in the shop
+        :param max_workers: number of concurrent requests of the refresh
+        :param id_shop: optional id of the shop of a multistore
+        :return: number of valid records in the cache
+        """
+        if self.record_cache is None:
+            raise PrestaShopWebServiceError('No record cache is configured')
+        options = {'id_shop': id_shop} if id_shop is not None else None
+        scope = self._record_scope(options)
+        valid, changed = self._validate_records(
+            scope, resource, self.record_cache.ids(scope, resource))
+        count = len(valid)
+        if refresh and changed:
+            results = self.get_many(resource, changed, options=options,
+                                    max_workers=max_workers)
+            count += sum(1 for result in results if result.error is None)
+        return count
+
+    def _invalidate_records(self, url, content=None):
+        """Drop the records written by a request from the record cache.
+
+        When the ids are unknown, all the records of the resource are
+        validated before their next use.
+        """
+        if self.record_cache is None:
+            return
+        ids = _url_ids(url)
+        if not ids and isinstance(content, dict) and content:
+            record = list(content.values())[0]
+            try:
+                ids = [_record_id(record)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        self.record_cache.invalidate(self._api_url, self._url_resource(url),
+                                     ids or None)
+
+    def _refresh_record(self, url, response):
+        """Keep the record returned by an edit in the record cache.
+
+        The response of a PUT holds the record as saved by the shop.
+        """
+        if self.record_cache is None or not isinstance(response, dict):
+            return
+        resource = self._url_resource(url)
+        if self.typed and resource not in self._typed_resources:
+            # its values are not converted as the ones of `get`
+            return
+        options = dict((key, values[0]) for key, values
+                       in parse_qs(urlparse(url).query).items())
+        scope = self._record_scope(options)
+        if scope is None:
+            return
+        content = response.get('prestashop', response)
+        try:
+            record_id = _response_record_id(content)
+        except (AttributeError, IndexError, KeyError, TypeError,
+                ValueError):
+            return
+        record = list(content.values())[0]
+        self.record_cache.store(scope, resource, record_id,
+                                _normalize_value(record.get('date_upd')),
+                                content)
 
     def get_with_url(self, url):
         """Retrieve (GET) a resource from a full URL.
@@ -587,27 +1553,241 @@ class PrestaShopWebServiceDict(PrestaShopWebService):
         :return: a dict of the response.
             Remove root keys ['prestashop'] from the message
         """
+        if self.typed:
+            self._load_converters(url)
         response = super(PrestaShopWebServiceDict, self).get_with_url(url)
         if isinstance(response, dict):
             return response['prestashop']
         else:
             return response
 
+    def _parse_later(self, response, event):
+        """Parse a response after the request, as `get_with_url` does."""
+        if self.typed:
+            self._load_converters(event.url)
+        _super = super(PrestaShopWebServiceDict, self)
+        parsed = _super._parse_later(response, event)
+        if isinstance(parsed, dict):
+            return parsed['prestashop']
+        return parsed
+
+    def _load_converters(self, url):
+        """Load the converters of the resource of an url for the typed mode.
+
+        The resources without synopsis (root, images, ...) are not
+        converted.
+        """
+        resource = self._url_resource(url)
+        if not resource or resource in self._typed_resources:
+            return
+        if 'schema' in parse_qs(urlparse(url).query):
+            # the schema itself is read without converters
+            return
+        try:
+            synopsis = self.get_schema(resource, 'synopsis')
+        except PrestaShopWebServiceError:
+            synopsis = None
+        tag, converters = coercion.field_converters(synopsis)
+        with self._schemas_lock:
+            if tag is not None:
+                self._converters[tag] = converters
+            self._typed_resources.add(resource)
+
+    def _get_fresh(self, resource, resource_id):
+        """Retrieve (GET) a record on the shop, never from a cache.
+
+        :param resource: type of resource to retrieve
+        :param resource_id: id of the record
+        :return: a dict of the response, as `get`
+        """
+        url = self._build_url(resource, resource_id)
+        if self.typed:
+            self._load_converters(url)
+        response = self._parse_response(
+            self._execute(url, 'GET', use_cache=False))
+        if isinstance(response, dict):
+            return response['prestashop']
+        return response
+
+    def get_batched(self, resource, resource_ids, options=None,
+                    max_url_length=2048, max_workers=1):
+        """Retrieve (GET) many records with as few requests as possible.
+
+        The ids are grouped in 'filter[id]=[1|2|3]' listings, each
+        listing url staying under max_url_length characters.
+
+        :param resource: type of resource to retrieve
+        :param resource_ids: iterable of ids to retrieve
+        :param options: Optional dict of parameters (one or more of
+                        'display', 'filter', 'sort'), 'full' is
+                        used when no 'display' is given
+        :param max_url_length: maximum length of the urls
+        :param max_workers: number of listings fetched concurrently
+        :return: tuple (dict of id: record, list of the missing ids)
+        """
+        resource_ids = list(OrderedDict.fromkeys(
+            int(resource_id) for resource_id in resource_ids))
+        options = dict(options or {})
+        display = options.setdefault('display', 'full')
+        if display != 'full':
+            # the id is needed to map the records
+            fields = display.strip('[]').split(',')
+            if 'id' not in fields:
+                options['display'] = '[%s]' % ','.join(['id'] + fields)
+        self._validate_query_options(options)
+
+        empty_options = dict(options, **{'filter[id]': '[]'})
+        empty_url = "%s%s?%s" % (
+            self._api_url, resource,
+            self._options_to_querystring(empty_options),
+        )
+        budget = max_url_length - len(empty_url)
+        separator_length = len(urlencode({'': '|'})) - 1
+        chunks = _chunk_ids(resource_ids, budget, separator_length)
+
+        def get_chunk(chunk):
+            chunk_options = dict(options, **{
+                'filter[id]': '[%s]' % '|'.join(str(i) for i in chunk)})
+            response = self.get(resource, options=chunk_options)
+            return _listing_elements(response)
+
+        found = {}
+        results = batch.iter_concurrently(get_chunk, chunks,
+                                          max_workers=max_workers,
+                                          errors=())
+        for result in results:
+            for record in result.result:
+                found[_record_id(record)] = record
+        records = OrderedDict()
+        missing = []
+        for resource_id in resource_ids:
+            if resource_id in found:
+                records[resource_id] = found[resource_id]
+            else:
+                missing.append(resource_id)
+        return records, missing
+
+    def stream_get(self, resource, options=None, chunk_size=65536):
+        """Retrieve (GET) the records of a listing with an incremental parse.
+
+        The response is read and parsed chunk by chunk, so the memory
+        used is bounded by one record instead of the whole response.
+        Useful for large listings with the 'display' option.
+
+        :param resource: type of resource to retrieve
+        :param options: optional dict of parameters (one or more of
+                        'filter', 'display', 'sort', 'limit')
+        :param chunk_size: size in bytes of the chunks read on the response
+        :return: generator of records as dict
+        """
+        full_url = self._build_url(resource, options=options)
+        return self.stream_get_with_url(full_url, chunk_size=chunk_size)
+
+    def stream_get_with_url(self, url, chunk_size=65536):
+        """Retrieve (GET) the records of a listing from a full URL.
+
+        :param url: URL of a listing of resources
+        :param chunk_size: size in bytes of the chunks read on the response
+        :return: generator of records as dict
+        """
+        if self.typed:
+            self._load_converters(url)
+        response = self._execute(url, 'GET', stream=True)
+        event = self._current_event()
+        # seconds spent reading the body and converting the records,
+        # excluded from the parse time
+        timings = {'read': 0.0, 'convert_time': 0.0}
+
+        def chunks():
+            body = response.iter_content(chunk_size=chunk_size)
+            while True:
+                start = timer()
+                chunk = next(body, None)
+                timings['read'] += timer() - start
+                if chunk is None:
+                    return
+                yield chunk
+
+        converters = self._converters if self.typed else None
+        records = xml2dict.iterparse_records(chunks(), converters=converters,
+                                             timings=timings)
+        elapsed = 0.0
+        try:
+            while True:
+                start = timer()
+                record = next(records, _END)
+                elapsed += timer() - start
+                if record is _END:
+                    break
+                yield record
+        except ElementTree.ParseError as e:
+            err = PrestaShopWebServiceError(
+                'HTTP XML response is not parsable : %s' % (e,)
+            )
+            if event is not None:
+                event.error = err
+                self._fire('on_error', event)
+            raise err
+        else:
+            if event is not None:
+                event.convert_time = timings['convert_time']
+                event.parse_time = max(
+                    0.0, elapsed - timings['read'] - event.convert_time)
+                self._fire('after_parse', event)
+        finally:
+            response.close()
+
+    def get_schema(self, resource, schema='blank'):
+        """Retrieve the schema of a resource.
+
+        The schema is fetched once per resource for the client, then
+        a copy of it is returned, the caller can modify it freely.
+
+        :param resource: type of resource
+        :param schema: 'blank' for an empty envelope of the resource
+            or 'synopsis' for the description of its fields
+        :return: a dict of the schema
+        """
+        if schema not in ('blank', 'synopsis'):
+            raise PrestaShopWebServiceError(
+                'Unsupported schema: %s' % (schema,)
+            )
+        key = (resource, schema)
+        with self._schemas_lock:
+            envelope = self._schemas.get(key)
+        if envelope is None:
+            envelope = self.get(resource, options={'schema': schema})
+            with self._schemas_lock:
+                envelope = self._schemas.setdefault(key, envelope)
+        return copy.deepcopy(envelope)
+
+    def invalidate_schemas(self, resource=None):
+        """Forget the schemas fetched by `get_schema`.
+
+        :param resource: type of resource, all when None
+        """
+        with self._schemas_lock:
+            if resource is None:
+                self._schemas.clear()
+                return
+            for key in [key for key in self._schemas if key[0] == resource]:
+                del self._schemas[key]
+
     def partial_add(self, resource, fields):
         """Add (POST) a resource without necessary all the content.
 
-        Retrieve the full empty envelope
-        and merge the given fields in this envelope.
+        Retrieve the full empty envelope (once per resource, see
+        `get_schema`) and merge the given fields in this envelope.
 
         :param resource: type of resource to create
         :param fields: dict of fields of the resource to create
         :return: response of the server
         """
-        blank_envelope = self.get(resource, options={'schema': 'blank'})
+        blank_envelope = self.get_schema(resource, 'blank')
         complete_content = dict(blank_envelope, **fields)
         return self.add(resource, complete_content)
 
-    def partial_edit(self, resource, resource_id, fields):
+    def partial_edit(self, resource, resource_id, fields, current=None):
         """Edit (PUT) partially a resource.
 
         Standard REST PUT means a full replacement of the resource.
@@ -616,18 +1796,87 @@ class PrestaShopWebServiceDict(PrestaShopWebService):
         then modify the keys in content,
         and write on prestashop.
 
+        The write is skipped when the fields do not change the record,
+        so it can be called for each record of a sync at a low cost.
+        The skip is only as fresh as the record it compares against:
+        when `current` is not given, the record is read on the shop,
+        without the response cache, the single flight nor the record
+        cache; a `current` copy which is outdated can skip a write
+        which is needed.
+
         :param resource: type of resource to edit
         :param resource_id: id of the resource to edit
         :param fields: dict containing the field name as key
             and the values of the files to modify
-        :return: an ElementTree of the Webservice's response
+        :param current: optional copy of the resource as returned by `get`,
+            used instead of reading it on prestashop, it is not modified
+        :return: a dict of the Webservice's response,
+            None when there is nothing to write
         """
-        complete_content = self.get(resource, resource_id)
+        if current is None:
+            complete_content = self._get_fresh(resource, resource_id)
+        else:
+            complete_content = copy.deepcopy(current)
+        changed = False
         for key in complete_content:
-            if fields.get(key):
-                complete_content[key].update(fields[key])
+            if key not in fields:
+                continue
+            changes = _diff_fields(complete_content[key], fields[key])
+            if changes:
+                complete_content[key].update(changes)
+                changed = True
+        if not changed:
+            return None
         return self.edit(resource, complete_content)
 
+    def bulk_add(self, resource, records, max_workers=4, max_pending=None):
+        """Add (POST) many resources concurrently.
+
+        The records are consumed lazily and at most `max_pending` are
+        serialized or sent at once, so `records` can be a generator of
+        any size. The serialization is done by the workers.
+
+        :param resource: type of resource to create
+        :param records: iterable of dicts of new resource values,
+            as given to `add`
+        :param max_workers: number of concurrent requests
+        :param max_pending: maximum number of records in progress,
+            default twice max_workers
+        :return: generator of BatchResult(record, created id, error)
+            in the order of the records
+        """
+        def add(record):
+            return _response_record_id(self.add(resource, record))
+        return self._bulk(add, records, max_workers, max_pending)
+
+    def bulk_edit(self, resource, records, max_workers=4, max_pending=None):
+        """Edit (PUT) many resources concurrently.
+
+        Same as `bulk_add` for the modification of existing records.
+
+        :param resource: type of resource to edit
+        :param records: iterable of modified dicts of the resources,
+            as given to `edit`
+        :param max_workers: number of concurrent requests
+        :param max_pending: maximum number of records in progress,
+            default twice max_workers
+        :return: generator of BatchResult(record, id, error)
+            in the order of the records
+        """
+        def edit(record):
+            return _response_record_id(self.edit(resource, record))
+        return self._bulk(edit, records, max_workers, max_pending)
+
+    def _bulk(self, func, records, max_workers, max_pending):
+        self._ensure_pool_size(max_workers)
+        return batch.iter_concurrently(
+            func, records,
+            max_workers=max_workers,
+            max_pending=max_pending,
+            errors=(PrestaShopWebServiceError,
+                    requests.exceptions.RequestException),
+        )
+
     def add_with_url(self, url, content=None, files=None):
         """Add (POST) a resource.
 
@@ -655,7 +1904,25 @@ class PrestaShopWebServiceDict(PrestaShopWebService):
         """
         xml_content = dict2xml.dict2xml({'prestashop': content})
         _super = super(PrestaShopWebServiceDict, self)
-        return _super.edit_with_url(url, xml_content)
+        try:
+            response = _super.edit_with_url(url, xml_content)
+        finally:
+            self._invalidate_records(url, content)
+        self._refresh_record(url, response)
+        return response
+
+    def delete_with_url(self, url):
+        """Delete (DELETE) a resource.
+
+        :param url: full URL to delete a resource
+        :return: True if delete is done,
+            raise an error PrestaShopWebServiceError if missed
+        """
+        _super = super(PrestaShopWebServiceDict, self)
+        try:
+            return _super.delete_with_url(url)
+        finally:
+            self._invalidate_records(url)
 
     def _parse(self, content):
         """Parse the response of the webservice, assumed to be a XML in utf-8.
@@ -664,7 +1931,8 @@ class PrestaShopWebServiceDict(PrestaShopWebService):
         :return: a dict of the content
         """
         parsed_content = super(PrestaShopWebServiceDict, self)._parse(content)
-        return xml2dict.ET2dict(parsed_content)
+        converters = self._converters if self.typed else None
+        return xml2dict.ET2dict(parsed_content, converters=converters)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Builder of the options of a listing, checking the fields against
+the synopsis schema of the resource.
+
+    query = (Query('products', prestashop)
+             .display('id', 'reference', 'price')
+             .filter('active', 1)
+             .filter('id_category_default', [2, 5])
+             .sort('-date_upd', 'id'))
+    for product in prestashop.select(query, page_size=500):
+        product.reference
+
+A Query is the dict of the options, it can be given as `options`
+to any method of the clients.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+from urllib.parse import urlencode
+
+from .prestapyt import PrestaShopWebServiceError
+
+LIKE = {
+    'begins': '[%s]%%',
+    'ends': '%%[%s]',
+    'contains': '%%[%s]%%',
+}
+
+
+def schema_fields(synopsis):
+    """Names of the fields of a resource from its synopsis schema.
+
+    :param synopsis: synopsis as returned by the dict client,
+        ie: {'product': {'id': '', 'price': {...}, ...}}
+    :return: frozenset of the field names
+    """
+    record = list(synopsis.values())[0] if synopsis else None
+    if not isinstance(record, dict):
+        return frozenset(['id'])
+    fields = set(record)
+    fields.discard('associations')
+    fields.add('id')
+    return frozenset(fields)
+
+
+class Query(dict):
+    """Options of a listing, built with chained calls."""
+
+    def __init__(self, resource, client=None, fields=None):
+        """
+        :param resource: type of resource, ie: 'products'
+        :param client: optional PrestaShopWebServiceDict, the fields are
+            read from the synopsis of the resource (cached by the client)
+        :param fields: optional names of the fields of the resource,
+            the field names are not checked without client nor fields
+        """
+        super(Query, self).__init__()
+        self.resource = resource
+        if fields is None and client is not None:
+            fields = schema_fields(client.get_schema(resource, 'synopsis'))
+        self.fields = frozenset(fields) if fields is not None else None
+
+    def _check(self, *fields):
+        if self.fields is None:
+            return
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise PrestaShopWebServiceError(
+                'Unknown fields for %s: %s' % (self.resource,
+                                               ', '.join(unknown))
+            )
+
+    def display(self, *fields):
+        """Fields returned for each record, 'full' for all of them."""
+        if fields == ('full',):
+            self['display'] = 'full'
+            return self
+        if not fields:
+            raise PrestaShopWebServiceError('display needs fields')
+        self._check(*fields)
+        self['display'] = '[%s]' % ','.join(fields)
+        return self
+
+    def filter(self, field, value):
+        """Filter the records on the value of a field.
+
+        :param field: name of the field
+        :param value: list or set of accepted values,
+            tuple (min, max) for an interval,
+            or a single value
+        """
+        self._check(field)
+        if isinstance(value, (list, set, frozenset)):
+            value = '[%s]' % '|'.join(str(item) for item in value)
+        elif isinstance(value, tuple):
+            if len(value) != 2:
+                raise PrestaShopWebServiceError(
+                    'An interval is a tuple (min, max)'
+                )
+            value = '[%s,%s]' % value
+        else:
+            value = '[%s]' % (value,)
+        self['filter[%s]' % (field,)] = value
+        return self
+
+    def like(self, field, text, match='contains'):
+        """Filter the records whose field begins, ends or contains a text."""
+        self._check(field)
+        if match not in LIKE:
+            raise PrestaShopWebServiceError(
+                'match must be one of: %s' % (', '.join(sorted(LIKE)),)
+            )
+        self['filter[%s]' % (field,)] = LIKE[match] % (text,)
+        return self
+
+    def sort(self, *fields):
+        """Order of the records, '-field' for a descending order."""
+        orders = []
+        for field in fields:
+            direction = 'ASC'
+            if field.startswith('-'):
+                field, direction = field[1:], 'DESC'
+            self._check(field)
+            orders.append('%s_%s' % (field, direction))
+        self['sort'] = '[%s]' % ','.join(orders)
+        return self
+
+    def limit(self, count, offset=None):
+        """Number of records returned, starting at offset."""
+        if offset is None:
+            self['limit'] = '%d' % (count,)
+        else:
+            self['limit'] = '%d,%d' % (offset, count)
+        return self
+
+    def id_shop(self, shop_id):
+        """Read the records of a shop in a multistore."""
+        self['id_shop'] = shop_id
+        return self
+
+    def id_group_shop(self, group_id):
+        """Read the records of a group of shops in a multistore."""
+        self['id_group_shop'] = group_id
+        return self
+
+    def date(self, enabled=True):
+        """Allow the filters on the date fields."""
+        if enabled:
+            self['date'] = 1
+        else:
+            self.pop('date', None)
+        return self
+
+    def to_options(self):
+        """The options as a plain dict."""
+        return dict(self)
+
+    def to_querystring(self):
+        """The options as a querystring, ie: 'display=[id,price]&...'"""
+        return urlencode(self)
+
+    def __repr__(self):
+        return 'Query(%r, %s)' % (self.resource, dict.__repr__(self))
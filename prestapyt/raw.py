@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Responses returned without parsing, or parsed on demand.
+
+    raw = prestashop.get_raw('products', 1)
+    forward(raw.content, raw.headers['Content-Type'])
+
+    product = prestashop.get_lazy('products', 1)
+    product.status_code          # no parse
+    product['product']['price']  # parsed on the first access
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import threading
+
+
+class RawResponse(object):
+    """Body and headers of a response, as received."""
+
+    __slots__ = ('url', 'status_code', 'headers', 'content')
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def view(self):
+        """memoryview on the body, slicing it does not copy the bytes."""
+        return memoryview(self.content)
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def __len__(self):
+        return len(self.content)
+
+    def __repr__(self):
+        return '<RawResponse %s %s %d bytes>' % (
+            self.status_code, self.url, len(self.content))
+
+
+_NOT_PARSED = object()
+
+
+class LazyResponse(object):
+    """Response parsed on the first access to its content.
+
+    The status, headers and body are available without parsing. The
+    parsed content (ElementTree or dict, as returned by `get`) is built
+    once, when `parsed` or one of its attributes or items is used.
+    """
+
+    def __init__(self, raw, parse):
+        """
+        :param raw: RawResponse
+        :param parse: callable without argument returning the parsed
+            content of the response
+        """
+        self.raw = raw
+        self._parse = parse
+        self._parsed = _NOT_PARSED
+        self._lock = threading.Lock()
+
+    @property
+    def status_code(self):
+        return self.raw.status_code
+
+    @property
+    def headers(self):
+        return self.raw.headers
+
+    @property
+    def content(self):
+        return self.raw.content
+
+    @property
+    def is_parsed(self):
+        return self._parsed is not _NOT_PARSED
+
+    @property
+    def parsed(self):
+        """The parsed content, parsed on the first call."""
+        if self._parsed is _NOT_PARSED:
+            with self._lock:
+                if self._parsed is _NOT_PARSED:
+                    self._parsed = self._parse()
+                    self._parse = None
+        return self._parsed
+
+    def __getattr__(self, name):
+        # only called for the attributes not defined above
+        if name.startswith('__') or name in ('raw', '_parse', '_parsed',
+                                             '_lock'):
+            raise AttributeError(name)
+        return getattr(self.parsed, name)
+
+    def __getitem__(self, key):
+        return self.parsed[key]
+
+    def __contains__(self, key):
+        return key in self.parsed
+
+    def __iter__(self):
+        return iter(self.parsed)
+
+    def __len__(self):
+        return len(self.parsed)
+
+    def __repr__(self):
+        if self.is_parsed:
+            return '<LazyResponse %r>' % (self._parsed,)
+        return '<LazyResponse %s %s not parsed>' % (self.raw.status_code,
+                                                    self.raw.url)
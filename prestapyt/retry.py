@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Retry policy and rate limiter of the webservice requests.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import random
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy(object):
+    """Decide which requests are retried and how long to wait.
+
+    Give it to a client to use it:
+
+        prestashop = PrestaShopWebServiceDict(
+            api_url, api_key, retry=RetryPolicy(total=5))
+    """
+
+    def __init__(self, total=3, backoff_factor=0.5, max_backoff=30,
+                 status_forcelist=(429, 500, 502, 503, 504),
+                 methods=('GET', 'HEAD', 'PUT', 'DELETE'),
+                 jitter=True, respect_retry_after=True):
+        """
+        :param total: maximum number of retries of a request
+        :param backoff_factor: the n-th retry waits up to
+            backoff_factor * 2 ** (n - 1) seconds
+        :param max_backoff: maximum number of seconds between 2 attempts
+        :param status_forcelist: status codes of the responses retried
+        :param methods: HTTP methods retried, the idempotent ones by default
+        :param jitter: wait a random duration between 0 and the backoff
+        :param respect_retry_after: wait the number of seconds asked by
+            the Retry-After header of the response when there is one
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = frozenset(status_forcelist)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+
+    def can_retry(self, method, attempt):
+        """Whether a request can be retried.
+
+        :param method: HTTP method of the request
+        :param attempt: number of retries already done
+        :return: bool
+        """
+        return attempt < self.total and method.upper() in self.methods
+
+    def is_retryable_status(self, status_code):
+        return status_code in self.status_forcelist
+
+    def backoff(self, attempt, response=None):
+        """Number of seconds to wait before a retry.
+
+        :param attempt: number of the retry, starting at 1
+        :param response: response of the failed attempt, if any
+        :return: number of seconds as float
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff,
+                    self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def _retry_after(self, response):
+        """Seconds asked by the Retry-After header, None if not any."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, date.timestamp() - time.time())
+
+
+class RateLimiter(object):
+    """Token bucket limiting the rate of the requests.
+
+    It is thread-safe, a limiter can be shared by the clients of the
+    same shop to limit their overall rate:
+
+        limiter = RateLimiter(rate=20, burst=40)
+        prestashop = PrestaShopWebServiceDict(
+            api_url, api_key, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: number of requests per second
+        :param burst: number of requests which can be done at once
+            after an idle period, default is `rate`
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request can be done.
+
+        A token is reserved even when the bucket is empty, so the
+        threads waiting are served in order.
+
+        :return: number of seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
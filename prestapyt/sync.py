@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental synchronization of the records changed since the last poll.
+
+    store = WatermarkStore('/var/lib/myapp/prestashop-sync.sqlite')
+    sync = IncrementalSync(prestashop, store)
+    for order in sync.changes('orders'):
+        process(order)
+
+The records are listed with 'date=1&filter[date_upd]=[from,to]' sorted
+by 'date_upd' then 'id'. The highest 'date_upd' received is the
+watermark of the resource, kept in a SQLite file.
+
+The next poll starts `skew` seconds before the watermark, to catch the
+records written with a late timestamp (clocks of the servers, long
+transactions). The records received in this window are remembered
+with their 'date_upd' so a record is delivered again only when it
+changed, including the records sharing the same timestamp.
+
+The progress is saved after each page, once its records have been
+consumed: a poll interrupted is resumed where it stopped, a record
+may be delivered twice but never lost.
+
+:license: AGPLv3, see LICENSE for more details
+"""
+
+import datetime
+import sqlite3
+import threading
+
+from . import dict2xml
+from .prestapyt import _listing_elements
+from .prestapyt import _record_id
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# lower bound of the first poll of a resource
+EPOCH = '1970-01-01 00:00:00'
+
+
+def _date_text(value):
+    """'date_upd' of a record as text, it is a datetime in typed mode."""
+    if isinstance(value, dict):
+        value = value.get('value')
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return dict2xml._format_value(value)
+    return value or EPOCH
+
+
+def _shift(date_text, seconds):
+    date = datetime.datetime.strptime(date_text, DATE_FORMAT)
+    return (date + datetime.timedelta(seconds=seconds)).strftime(DATE_FORMAT)
+
+
+class WatermarkStore(object):
+    """Watermarks of the resources and records recently synchronized,
+    kept in a SQLite file."""
+
+    def __init__(self, path=':memory:'):
+        """
+        :param path: path of the SQLite file, in memory by default
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS watermarks ('
+                ' resource TEXT PRIMARY KEY,'
+                ' watermark TEXT NOT NULL)'
+            )
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS seen ('
+                ' resource TEXT NOT NULL,'
+                ' id INTEGER NOT NULL,'
+                ' date_upd TEXT NOT NULL,'
+                ' PRIMARY KEY (resource, id))'
+            )
+
+    def watermark(self, resource):
+        """Highest 'date_upd' synchronized for a resource, None if never."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT watermark FROM watermarks WHERE resource = ?',
+                (resource,)).fetchone()
+        return row[0] if row else None
+
+    def seen(self, resource):
+        """Records received in the skew window, as a dict id: date_upd."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id, date_upd FROM seen WHERE resource = ?',
+                (resource,)).fetchall()
+        return dict(rows)
+
+    def advance(self, resource, watermark, records, cutoff):
+        """Save the progress of a resource in a single transaction.
+
+        :param resource: type of resource
+        :param watermark: new watermark
+        :param records: dict id: date_upd of the records received
+        :param cutoff: the records older than this date are forgotten
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO watermarks (resource, watermark)'
+                    ' VALUES (?, ?)', (resource, watermark))
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO seen (resource, id, date_upd)'
+                    ' VALUES (?, ?, ?)',
+                    [(resource, record_id, date_upd)
+                     for record_id, date_upd in records.items()])
+                self._db.execute(
+                    'DELETE FROM seen WHERE resource = ? AND date_upd < ?',
+                    (resource, cutoff))
+
+    def reset(self, resource=None):
+        """Forget the progress of a resource, all when None."""
+        with self._lock:
+            with self._db:
+                if resource is None:
+                    self._db.execute('DELETE FROM watermarks')
+                    self._db.execute('DELETE FROM seen')
+                else:
+                    self._db.execute(
+                        'DELETE FROM watermarks WHERE resource = ?',
+                        (resource,))
+                    self._db.execute(
+                        'DELETE FROM seen WHERE resource = ?', (resource,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class IncrementalSync(object):
+    """List the records of resources changed since the previous poll."""
+
+    def __init__(self, client, store, skew=300, page_size=100,
+                 clock=datetime.datetime.now):
+        """
+        :param client: PrestaShopWebServiceDict
+        :param store: WatermarkStore
+        :param skew: tolerance in seconds on the clocks and on the
+            records committed late
+        :param page_size: number of records requested per page
+        :param clock: function returning the current time in the
+            timezone of the shop, as a naive datetime
+        """
+        self.client = client
+        self.store = store
+        self.skew = skew
+        self.page_size = page_size
+        self.clock = clock
+
+    def changes(self, resource, options=None):
+        """Retrieve the records of a resource changed since the last poll.
+
+        :param resource: type of resource, it must have a 'date_upd'
+            field, ie: 'orders', 'customers', 'stock_availables'
+        :param options: optional dict of parameters, ie: a 'filter' or a
+            'display' ('full' by default, 'id' and 'date_upd' are added)
+        :return: generator of records as dict
+        """
+        options = dict(options or {})
+        display = options.setdefault('display', 'full')
+        if display != 'full':
+            fields = display.strip('[]').split(',')
+            missing = [field for field in ('id', 'date_upd')
+                       if field not in fields]
+            options['display'] = '[%s]' % ','.join(missing + fields)
+        options['date'] = 1
+        options['sort'] = '[date_upd_ASC,id_ASC]'
+
+        watermark = self.store.watermark(resource)
+        seen = self.store.seen(resource)
+        cursor = _shift(watermark, -self.skew) if watermark else EPOCH
+        upper = (self.clock() +
+                 datetime.timedelta(seconds=self.skew)).strftime(DATE_FORMAT)
+        # records of the page at the cursor date already listed
+        offset = 0
+        while True:
+            page_options = dict(options, **{
+                'filter[date_upd]': '[%s,%s]' % (cursor, upper),
+                'limit': '%d,%d' % (offset, self.page_size),
+            })
+            records = _listing_elements(
+                self.client.get(resource, options=page_options))
+            received = {}
+            for record in records:
+                record_id = _record_id(record)
+                date_upd = _date_text(record.get('date_upd'))
+                received[record_id] = date_upd
+                if seen.get(record_id) == date_upd:
+                    continue
+                yield record
+            # the records of the page are consumed
+            if received:
+                seen.update(received)
+                last = max(received.values())
+                if watermark is None or last > watermark:
+                    watermark = last
+                self.store.advance(resource, watermark, received,
+                                   _shift(watermark, -self.skew))
+            if len(records) < self.page_size:
+                return
+            # keyset pagination: the next page starts at the date of the
+            # last record, skipping the records of this date already listed
+            last = _date_text(records[-1].get('date_upd'))
+            if last == cursor:
+                offset += len(records)
+            else:
+                cursor = last
+                offset = sum(1 for record in records
+                             if _date_text(record.get('date_upd')) == last)
+
+    def reset(self, resource=None):
+        """Synchronize again all the records of a resource, all when None."""
+        self.store.reset(resource)
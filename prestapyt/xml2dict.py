@@ -12,77 +12,177 @@
 
 import re
 
+from timeit import default_timer as timer
+
 try:
     import xml.etree.cElementTree as ET
 except ImportError as err:
     import xml.etree.ElementTree as ET
 
 
-def _parse_node(node):
-    tree = {}
+_NAMESPACE_RE = re.compile(r"\{(.*)\}(.*)")
+
+_XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+# cache of tag: (namespace, tag), a document only has a few distinct tags
+_split_tags = {}
+_SPLIT_TAGS_MAX = 4096
+
+def _split_tag(tag):
+    """Split a tag like '{http://www.w3.org/1999/xlink}href'
+       to ('http://www.w3.org/1999/xlink', 'href'),
+       the namespace is None when the tag has none
+    """
+    try:
+        return _split_tags[tag]
+    except KeyError:
+        pass
+    result = _NAMESPACE_RE.search(tag)
+    split = result.groups() if result else (None, tag)
+    if len(_split_tags) >= _SPLIT_TAGS_MAX:
+        _split_tags.clear()
+    _split_tags[tag] = split
+    return split
+
+def _node_attrs(node):
     attrs = {}
     for attr_tag, attr_value in node.attrib.items():
         #  skip href attributes, not supported when converting to dict
-        if attr_tag == '{http://www.w3.org/1999/xlink}href':
+        if attr_tag == _XLINK_HREF:
             continue
-        attrs.update(_make_dict(attr_tag, attr_value))
-
-    value = node.text.strip() if node.text is not None else ''
-
+        namespace, attr_tag = _split_tag(attr_tag)
+        if namespace is None:
+            attrs[attr_tag] = attr_value
+        else:
+            attrs[attr_tag] = {'value': attr_value, 'xmlns': namespace}
+    return attrs
+
+def _parse_node(node, converters=None):
+    """Convert an element and its descendants to a dict
+
+    The tree is walked iteratively, deep documents can not reach
+    the recursion limit. Each frame of the stack is
+    [element, iterator on its children, dict of the element, has child].
+
+    @param converters: optional dict {tag of a record: {field: callable}},
+                       the value of a field without children of a record
+                       is converted with the callable of the field
+    """
+    tree = {}
+    attrs = _node_attrs(node) if node.attrib else None
     if attrs:
         tree['attrs'] = attrs
+    stack = [[node, iter(node), tree, False]]
+    while True:
+        frame = stack[-1]
+        child = next(frame[1], None)
+        if child is not None:
+            frame[3] = True
+            tree = {}
+            attrs = _node_attrs(child) if child.attrib else None
+            if attrs:
+                tree['attrs'] = attrs
+            stack.append([child, iter(child), tree, False])
+            continue
 
-    #Save childrens
-    has_child = False
-    for child in list(node):
-        has_child = True
-        ctag = child.tag
-        ctree = _parse_node(child)
-        cdict = _make_dict(ctag, ctree)
-
-        # no value when there is child elements
-        if ctree:
-            value = ''
-
+        stack.pop()
+        node, _, tree, has_child = frame
+        if not has_child:
+            text = node.text
+            tree['value'] = text.strip() if text is not None else ''
+            if converters and stack:
+                fields = converters.get(stack[-1][0].tag)
+                if fields:
+                    convert = fields.get(node.tag)
+                    if convert is not None:
+                        tree['value'] = convert(tree['value'])
+        # if there is only a value; no attribute, no child,
+        # we return directly the value
+        if len(tree) == 1 and 'value' in tree:
+            tree = tree['value']
+        if not stack:
+            return tree
+
+        parent_tree = stack[-1][2]
+        ctag = node.tag
+        namespace, tag = _split_tag(ctag)
         # first time an attribute is found
-        if ctag not in tree: # First time found
-            tree.update(cdict)
+        if ctag not in parent_tree:
+            if namespace is None:
+                parent_tree[tag] = tree
+            else:
+                parent_tree[tag] = {'value': tree, 'xmlns': namespace}
             continue
 
         # many times the same attribute, we change to a list
-        old = tree[ctag]
+        old = parent_tree[ctag]
         if not isinstance(old, list):
-            tree[ctag] = [old] # change to list
-        tree[ctag].append(ctree) # Add new entry
-
-    if not has_child:
-        tree['value'] = value
-
-    # if there is only a value; no attribute, no child, we return directly the value
-    if list(tree.keys()) == ['value']:
-        tree = tree['value']
-    return tree
+            parent_tree[ctag] = [old]
+        parent_tree[ctag].append(tree)
 
 def _make_dict(tag, value):
     """Generate a new dict with tag and value
        If tag is like '{http://cs.sfsu.edu/csc867/myscheduler}patients',
        split it first to: http://cs.sfsu.edu/csc867/myscheduler, patients
     """
-    tag_values = value
-    result = re.compile("\{(.*)\}(.*)").search(tag)
-    if result:
-        tag_values = {'value': value}
-        tag_values['xmlns'], tag = result.groups() # We have a namespace!
-    return {tag: tag_values}
+    namespace, tag = _split_tag(tag)
+    if namespace is None:
+        return {tag: value}
+    return {tag: {'value': value, 'xmlns': namespace}}
+
+def iterparse_records(chunks, depth=2, converters=None, timings=None):
+    """Parse xml chunks incrementally and yield the records one by one
+
+    Only the record being parsed is held in memory: once converted,
+    a record is removed from the tree.
+
+    @param chunks: iterable of xml strings or bytes, as received
+    @param depth:  depth of the records in the document, the default
+                   matches a listing <prestashop><products><product>
+    @param converters: optional converters of the fields, see _parse_node
+    @param timings: optional dict, the seconds spent converting the
+                    records are added to its 'convert_time' key
+    @return: generator of records, as returned by _parse_node
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    parents = []
+
+    def records():
+        for event, elem in parser.read_events():
+            if event == 'start':
+                parents.append(elem)
+                continue
+            parents.pop()
+            if len(parents) == depth:
+                if timings is None:
+                    record = _parse_node(elem, converters)
+                else:
+                    start = timer()
+                    record = _parse_node(elem, converters)
+                    timings['convert_time'] += timer() - start
+                parents[-1].remove(elem)
+                yield record
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for record in records():
+            yield record
+    parser.close()
+    for record in records():
+        yield record
 
 def xml2dict(xml):
     """Parse xml string to dict"""
     element_tree = ET.fromstring(xml)
     return ET2dict(element_tree)
 
-def ET2dict(element_tree):
-    """Parse xml string to dict"""
-    return _make_dict(element_tree.tag, _parse_node(element_tree))
+def ET2dict(element_tree, converters=None):
+    """Parse xml string to dict
+
+    @param converters: optional converters of the fields, see _parse_node
+    """
+    return _make_dict(element_tree.tag,
+                      _parse_node(element_tree, converters))
 
 if __name__ == '__main__':
     from pprint import pprint
@@ -26,6 +26,7 @@ setup(
 
     # Package dependencies.
     install_requires = ['requests', 'future', 'importlib-metadata; python_version < "3.8"'],
+    extras_require = {'async': ['aiohttp']},
     setup_requires=[
         'setuptools_scm',
     ],